@@ -1,8 +1,12 @@
 from flask import Flask, request
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import configure_mappers
 from dotenv import load_dotenv
 import os
+import sqlite3
 
 # Load environment variables
 load_dotenv()
@@ -10,6 +14,22 @@ load_dotenv()
 # Initialize SQLAlchemy
 db = SQLAlchemy()
 
+# SQLite ignores foreign keys, and therefore ON DELETE CASCADE, unless asked per connection
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+def same_database(uri, other):
+    """Whether two database URIs point at the same database."""
+    uri, other = make_url(uri), make_url(other)
+    if uri.get_backend_name() == 'sqlite' and other.get_backend_name() == 'sqlite':
+        # Every connection to sqlite:// gets its own in-memory database
+        return bool(uri.database) and os.path.abspath(uri.database) == os.path.abspath(other.database or '')
+    return uri == other
+
 def create_app():
     # Initialize the Flask application
     app = Flask(__name__)
@@ -17,7 +37,7 @@ def create_app():
     # Enable CORS for all routes with all origins
     CORS(app, 
          origins=["http://localhost:8080", "http://127.0.0.1:8080"], 
-         allow_headers=["Content-Type", "Authorization"],
+         allow_headers=["Content-Type", "Authorization", "Idempotency-Key"],
          supports_credentials=True,
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
     
@@ -29,17 +49,41 @@ def create_app():
     
     # Configure database
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', 'sqlite:///instance/gallery.db')
+    # Favorites, like/dislike counters and trending scores take most of the writes.
+    # Point INTERACTIONS_DATABASE_URI at its own database (e.g. another SQLite file,
+    # or sqlite:// in tests) so they stop sharing the catalog's write lock.
+    interactions_uri = os.getenv('INTERACTIONS_DATABASE_URI')
+    separate_interactions = bool(interactions_uri) and not same_database(
+        interactions_uri, app.config['SQLALCHEMY_DATABASE_URI']
+    )
+    if separate_interactions:
+        app.config['SQLALCHEMY_BINDS'] = {'interactions': interactions_uri}
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev_key_for_testing')
     
     # Initialize extensions with app
     db.init_app(app)
+    if not separate_interactions:
+        # A second engine on the same SQLite file would wait on the catalog
+        # connection's write lock whenever one session writes to both binds.
+        # Sharing the engine keeps such sessions on one connection and one transaction.
+        with app.app_context():
+            db.engines['interactions'] = db.engines[None]
     
     # Import and initialize models after db is configured with app
-    from app.models import artwork, user, favorite
+    from app.models import artwork, user, favorite, ranking, similar, facet, reaction, comment, artist
     artwork.set_db(db)
     user.set_db(db)
     favorite.set_db(db)
+    ranking.set_db(db)
+    similar.set_db(db)
+    facet.set_db(db)
+    reaction.set_db(db)
+    comment.set_db(db)
+    artist.set_db(db)
+    # Backrefs such as Artwork.artist only exist once the mappers are
+    # configured, which otherwise waits for the first query
+    configure_mappers()
     
     # Setup utils after models
     from app import utils
@@ -49,13 +93,49 @@ def create_app():
     from app.routes.auth import auth_bp
     from app.routes.artwork import artwork_bp
     from app.routes.favorites import favorites_bp
+    from app.routes.events import events_bp
+    from app.routes.comments import comments_bp
+    from app.routes.artists import artists_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(artwork_bp, url_prefix='/api')
     app.register_blueprint(favorites_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+    app.register_blueprint(comments_bp, url_prefix='/api')
+    app.register_blueprint(artists_bp, url_prefix='/api')
+    
+    # Behind a reverse proxy every request comes from the proxy's address.
+    # Trust the last TRUSTED_PROXIES hops of X-Forwarded-For so rate limits
+    # key on the real client; leave it at 0 when clients connect directly,
+    # or anyone could pick their own address.
+    trusted_proxies = int(os.getenv('TRUSTED_PROXIES', '0'))
+    if trusted_proxies:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies)
+    
+    # Per-route-class concurrency limits, load shedding and auth rate limits
+    from app import admission
+    admission.init_app(app)
+    
+    # Live counter events are relayed between worker processes
+    from app import events
+    events.init_app(app)
+    
+    # Artwork detail responses shared between workers, wiped at every boot
+    from app import detail_cache
+    detail_cache.init_app(app)
+    
+    # Group commit for posted comments
+    from app import comments
+    comments.init_app(app)
+    
+    # Register CLI maintenance commands
+    from app.commands import register_commands
+    register_commands(app)
     
-    # Create database tables
+    # Create database tables when the schema stamp is missing or out of date
+    from app.schema import ensure_schema
     with app.app_context():
-        db.create_all()
+        ensure_schema(db)
     
     return app 
\ No newline at end of file
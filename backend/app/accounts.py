@@ -0,0 +1,36 @@
+# Handle imports in a way that works both at runtime and for linters
+try:
+    from app import db
+    from app import artists, detail_cache, facets, reactions
+    from app.models.artwork import Artwork
+    from app.models.user import User
+except ImportError:
+    # These will be properly imported when the Flask app runs
+    pass
+
+def delete_account(user_id):
+    """Delete a user with their artworks and favorites in set-based statements.
+    
+    ON DELETE CASCADE would remove the artworks on its own, but issuing the
+    DELETEs explicitly keeps this correct on databases created before the
+    cascades existed, and never loads the rows into the session. Favorites and
+    counters live on the interactions database and are removed by id, and
+    the user's favorites are taken off the totals of the artists they favorited.
+    """
+    artwork_ids = db.session.execute(
+        db.select(Artwork.id).where(Artwork.artist_id == user_id)
+    ).scalars().all()
+    
+    facets.remove_artist(user_id)
+    artists.remove_account(user_id)
+    changed = reactions.remove(artwork_ids, user_id=user_id)
+    Artwork.query.filter(Artwork.artist_id == user_id).delete(synchronize_session=False)
+    User.query.filter(User.id == user_id).delete(synchronize_session=False)
+    db.session.commit()
+    
+    for artwork_id in artwork_ids:
+        detail_cache.invalidate(artwork_id)
+    # The user's comments and favorites also came off other artists' artworks
+    reactions.announce(changed)
+    
+    return len(artwork_ids)
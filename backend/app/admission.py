@@ -0,0 +1,279 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from flask import current_app, g, jsonify, request
+
+# All admission control settings live here. Override any of them with the
+# ADMISSION_LIMITS / RATE_LIMITS app config keys, which are merged per class.
+#
+# limit:     requests of the class running at once in this worker
+# target_ms: acceptable queueing delay; CoDel starts shedding once every
+#            request for a whole interval has waited longer than this
+# interval_ms: how long the delay must stay above target before shedding
+# max_wait_ms: hard cap on queueing, whatever the controller state
+DEFAULT_LIMITS = {
+    'read': {'limit': 64, 'target_ms': 50, 'interval_ms': 100, 'max_wait_ms': 1000},
+    'auth': {'limit': 4, 'target_ms': 200, 'interval_ms': 500, 'max_wait_ms': 2000},
+    'upload': {'limit': 4, 'target_ms': 500, 'interval_ms': 1000, 'max_wait_ms': 5000},
+    'write': {'limit': 16, 'target_ms': 100, 'interval_ms': 200, 'max_wait_ms': 2000},
+    # Comment posts mostly wait on a shared group commit, so many can be in flight
+    'comment': {'limit': 256, 'target_ms': 100, 'interval_ms': 200, 'max_wait_ms': 2000},
+}
+
+# Token buckets: capacity is the burst size, rate is tokens refilled per second
+DEFAULT_RATE_LIMITS = {
+    'auth.login': {'ip': {'capacity': 20, 'rate': 0.2}, 'user': {'capacity': 5, 'rate': 0.05}},
+    'auth.register': {'ip': {'capacity': 5, 'rate': 0.01}, 'user': {'capacity': 3, 'rate': 0.01}},
+}
+
+# Endpoints that are classified explicitly rather than by method
+ENDPOINT_CLASSES = {
+    'auth.login': 'auth',
+    'auth.register': 'auth',
+    'artwork.create_artwork': 'upload',
+    'comments.add_comment': 'comment',
+    # Event streams stay open indefinitely and would pin a slot each
+    'events.artwork_events': None,
+    'events.category_events': None,
+    'admission_metrics': None,
+}
+
+# Buckets kept per endpoint and key kind before the least recently used are evicted
+MAX_BUCKETS = 100000
+
+
+class Shed(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('enqueued', 'event', 'outcome')
+
+    def __init__(self, enqueued):
+        self.enqueued = enqueued
+        self.event = threading.Event()
+        # 'admitted' or 'shed' once dispatched, 'expired' after max_wait
+        self.outcome = None
+
+
+class RouteClass:
+    """Concurrency limit with CoDel-style shedding on queueing delay.
+
+    Waiting requests form a FIFO queue and are handed free slots oldest
+    first. A request's delay is measured when it leaves the queue. While the
+    queue has not been empty for a whole interval it is a standing queue,
+    and requests leaving it after more than target are shed from the head;
+    otherwise it is a burst, and requests may wait up to interval. Admitted
+    requests therefore wait about target at most under sustained overload.
+    """
+
+    def __init__(self, name, limit, target_ms, interval_ms, max_wait_ms):
+        self.name = name
+        self.limit = limit
+        self.target = target_ms / 1000
+        self.interval = interval_ms / 1000
+        self.max_wait = max_wait_ms / 1000
+        self._lock = threading.Lock()
+        self._waiting = deque()
+        self._in_flight = 0
+        # Last time the queue was empty; older than interval means a standing queue
+        self._last_empty = time.monotonic()
+        self.admitted = 0
+        self.shed = 0
+        self.max_delay = 0.0
+        self.delay_ewma = 0.0
+
+    def acquire(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiting:
+                self._last_empty = now
+                self._admit(0.0)
+                return
+            waiter = _Waiter(now)
+            self._waiting.append(waiter)
+
+        if not waiter.event.wait(self.max_wait):
+            with self._lock:
+                if waiter.outcome is None:
+                    waiter.outcome = 'expired'
+                    self._waiting.remove(waiter)
+                    self.shed += 1
+                    if not self._waiting:
+                        self._last_empty = time.monotonic()
+        if waiter.outcome != 'admitted':
+            raise Shed(self._retry_after())
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch(time.monotonic())
+
+    def _dispatch(self, now):
+        """Hand free slots to the oldest waiters, shedding those that waited too long."""
+        while self._in_flight < self.limit and self._waiting:
+            waiter = self._waiting.popleft()
+            delay = now - waiter.enqueued
+            if self._should_shed(delay, now):
+                waiter.outcome = 'shed'
+                self.shed += 1
+            else:
+                waiter.outcome = 'admitted'
+                self._admit(delay)
+            waiter.event.set()
+        if not self._waiting:
+            self._last_empty = now
+
+    def _admit(self, delay):
+        self._in_flight += 1
+        self.admitted += 1
+        self.max_delay = max(self.max_delay, delay)
+        self.delay_ewma = 0.9 * self.delay_ewma + 0.1 * delay
+
+    def _should_shed(self, delay, now):
+        # Short bursts are absorbed by the queue; only a standing queue,
+        # one that has not drained for a full interval, is held to target
+        standing = now - self._last_empty >= self.interval
+        return delay > (self.target if standing else self.interval)
+
+    def _retry_after(self):
+        return max(1, math.ceil(self.delay_ewma + self.interval))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self._in_flight,
+                'queued': len(self._waiting),
+                'admitted': self.admitted,
+                'shed': self.shed,
+                'queue_delay_ewma_ms': round(self.delay_ewma * 1000, 2),
+                'queue_delay_max_ms': round(self.max_delay * 1000, 2),
+            }
+
+
+class TokenBuckets:
+    """Token buckets keyed by client, evicting the least recently used."""
+
+    def __init__(self, capacity, rate, max_buckets=MAX_BUCKETS):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_buckets = max_buckets
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self.limited = 0
+
+    def take(self, key):
+        """Spend a token; return 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                wait = 0
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.limited += 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class AdmissionController:
+    def __init__(self, limits, rate_limits):
+        self.classes = {name: RouteClass(name, **settings) for name, settings in limits.items()}
+        self.rate_limits = {
+            endpoint: {kind: TokenBuckets(**settings) for kind, settings in kinds.items()}
+            for endpoint, kinds in rate_limits.items()
+        }
+
+    def classify(self, endpoint, method):
+        if endpoint in ENDPOINT_CLASSES:
+            return ENDPOINT_CLASSES[endpoint]
+        return 'read' if method in ('GET', 'HEAD') else 'write'
+
+    def check_rate(self, endpoint):
+        buckets = self.rate_limits.get(endpoint)
+        if not buckets:
+            return 0
+
+        keys = {'ip': request.remote_addr}
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            data = {}
+        # Login attempts are keyed by the account being tried, not the caller
+        user = data.get('email') or data.get('username')
+        if isinstance(user, str):
+            keys['user'] = user.strip().lower()
+
+        wait = 0
+        for kind, key in keys.items():
+            if kind in buckets and key:
+                wait = max(wait, buckets[kind].take(key))
+        return wait
+
+    def metrics(self):
+        return {
+            'classes': {name: route_class.snapshot() for name, route_class in self.classes.items()},
+            'rate_limited': {
+                endpoint: {kind: bucket.limited for kind, bucket in kinds.items()}
+                for endpoint, kinds in self.rate_limits.items()
+            },
+        }
+
+
+def _merge(defaults, overrides):
+    merged = {name: dict(settings) for name, settings in defaults.items()}
+    for name, settings in (overrides or {}).items():
+        merged.setdefault(name, {}).update(settings)
+    return merged
+
+
+def _unavailable(message, status, retry_after):
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def init_app(app):
+    """Install admission control and the metrics endpoint on an app."""
+    controller = AdmissionController(
+        _merge(DEFAULT_LIMITS, app.config.get('ADMISSION_LIMITS')),
+        _merge(DEFAULT_RATE_LIMITS, app.config.get('RATE_LIMITS')),
+    )
+    app.extensions['admission'] = controller
+
+    @app.before_request
+    def admit():
+        endpoint = request.endpoint
+        name = controller.classify(endpoint, request.method)
+        if name is None:
+            return None
+
+        wait = controller.check_rate(endpoint)
+        if wait:
+            return _unavailable('Too many attempts, please try again later', 429, wait)
+
+        route_class = controller.classes[name]
+        try:
+            route_class.acquire()
+        except Shed as shed:
+            return _unavailable('Server is busy, please retry', 503, shed.retry_after)
+        g.admission_class = route_class
+        return None
+
+    @app.teardown_request
+    def release(exc):
+        route_class = g.pop('admission_class', None)
+        if route_class is not None:
+            route_class.release()
+
+    @app.route('/api/metrics', endpoint='admission_metrics', methods=['GET'])
+    def metrics():
+        return jsonify(current_app.extensions['admission'].metrics()), 200
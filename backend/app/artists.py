@@ -0,0 +1,169 @@
+from sqlalchemy import case, func, or_
+from sqlalchemy.exc import IntegrityError
+
+# Handle imports in a way that works both at runtime and for linters
+try:
+    from app import db
+    from app.models.artist import ArtistStats
+    from app.models.artwork import Artwork
+    from app.models.favorite import Favorite
+    from app.models.reaction import ArtworkReaction
+    from app.reactions import ID_BATCH_SIZE
+except ImportError:
+    # These will be properly imported when the Flask app runs
+    pass
+
+COUNTERS = ('artwork_count', 'likes', 'dislikes', 'favorites')
+STAT_FIELDS = COUNTERS + ('latest_upload',)
+
+def _update(artist_id, values, initial):
+    """UPDATE the stats row, inserting it from initial when it does not exist yet."""
+    row = ArtistStats.query.filter_by(artist_id=artist_id)
+    if row.update(values, synchronize_session=False):
+        return
+
+    # A concurrent transaction may create the row first; then apply the UPDATE to it
+    try:
+        with db.session.begin_nested():
+            db.session.add(ArtistStats(artist_id=artist_id, **dict(
+                {counter: 0 for counter in COUNTERS}, **initial
+            )))
+    except IntegrityError:
+        row.update(values, synchronize_session=False)
+
+def adjust(artist_id, **deltas):
+    """Atomically add to an artist's totals, e.g. adjust(artwork.artist_id, likes=1)."""
+    _update(artist_id, {
+        getattr(ArtistStats, name): getattr(ArtistStats, name) + delta for name, delta in deltas.items()
+    }, deltas)
+
+def artwork_added(artwork):
+    """Count a new artwork; call after it has been flushed so created_at is set."""
+    created_at = artwork.created_at
+    _update(artwork.artist_id, {
+        ArtistStats.artwork_count: ArtistStats.artwork_count + 1,
+        ArtistStats.latest_upload: case(
+            (or_(ArtistStats.latest_upload.is_(None), ArtistStats.latest_upload < created_at), created_at),
+            else_=ArtistStats.latest_upload
+        ),
+    }, {'artwork_count': 1, 'latest_upload': created_at})
+
+def artwork_removed(artwork):
+    """Take an artwork and its counters off its artist's totals before it is deleted."""
+    favorites = Favorite.query.filter_by(artwork_id=artwork.id).count()
+    # Deletes are rare, so look the previous upload up on the artist_id index
+    latest_upload = db.session.query(func.max(Artwork.created_at)).filter(
+        Artwork.artist_id == artwork.artist_id, Artwork.id != artwork.id
+    ).scalar()
+    _update(artwork.artist_id, {
+        ArtistStats.artwork_count: ArtistStats.artwork_count - 1,
+        ArtistStats.likes: ArtistStats.likes - artwork.likes,
+        ArtistStats.dislikes: ArtistStats.dislikes - artwork.dislikes,
+        ArtistStats.favorites: ArtistStats.favorites - favorites,
+        ArtistStats.latest_upload: latest_upload,
+    }, {'latest_upload': latest_upload})
+
+def remove_account(user_id):
+    """Drop a deleted user's stats and take their favorites off other artists.
+
+    Call before the user's favorites are deleted.
+    """
+    ArtistStats.query.filter_by(artist_id=user_id).delete(synchronize_session=False)
+
+    artwork_ids = [row[0] for row in db.session.query(Favorite.artwork_id).filter(Favorite.user_id == user_id)]
+    per_artist = {}
+    for start in range(0, len(artwork_ids), ID_BATCH_SIZE):
+        batch = artwork_ids[start:start + ID_BATCH_SIZE]
+        for artist_id, count in db.session.query(Artwork.artist_id, func.count(Artwork.id)).filter(
+            Artwork.id.in_(batch), Artwork.artist_id != user_id
+        ).group_by(Artwork.artist_id):
+            per_artist[artist_id] = per_artist.get(artist_id, 0) + count
+    for artist_id, count in per_artist.items():
+        adjust(artist_id, favorites=-count)
+
+def has_stats(artist_id):
+    """Whether any totals are kept for this user, even if they are no longer an artist."""
+    return ArtistStats.query.get(artist_id) is not None
+
+def get(artist_id):
+    stats = ArtistStats.query.get(artist_id)
+    if stats is None:
+        return dict({counter: 0 for counter in COUNTERS}, latest_upload=None)
+    return stats.to_dict()
+
+def compute():
+    """Recompute every artist's totals from artworks, counters and favorites."""
+    expected = {}
+    for artist_id, count, latest_upload in db.session.query(
+        Artwork.artist_id, func.count(Artwork.id), func.max(Artwork.created_at)
+    ).group_by(Artwork.artist_id):
+        expected[artist_id] = dict({counter: 0 for counter in COUNTERS},
+                                   artwork_count=count, latest_upload=latest_upload)
+
+    # Counters and favorites live on the interactions database, keyed by artwork
+    artist_of = dict(db.session.query(Artwork.id, Artwork.artist_id))
+    for artwork_id, likes, dislikes in db.session.query(
+        ArtworkReaction.artwork_id, ArtworkReaction.likes, ArtworkReaction.dislikes
+    ).filter(or_(ArtworkReaction.likes != 0, ArtworkReaction.dislikes != 0)):
+        if artwork_id in artist_of:
+            totals = expected[artist_of[artwork_id]]
+            totals['likes'] += likes
+            totals['dislikes'] += dislikes
+    for artwork_id, count in db.session.query(
+        Favorite.artwork_id, func.count(Favorite.id)
+    ).group_by(Favorite.artwork_id):
+        if artwork_id in artist_of:
+            expected[artist_of[artwork_id]]['favorites'] += count
+    return expected
+
+def reconcile(dry_run=False):
+    """Recompute all stats in bulk, report drift and (unless dry_run) correct it.
+
+    Increments that land between the recount and the commit are overwritten,
+    so schedule this when traffic is low.
+    Returns {'artists', 'drifted', 'drift': {field: total}, 'examples': [...]}.
+    """
+    expected = compute()
+    stored = {stats.artist_id: stats for stats in ArtistStats.query}
+    empty = dict({counter: 0 for counter in COUNTERS}, latest_upload=None)
+
+    drift = {field: 0 for field in STAT_FIELDS}
+    drifted = []
+    for artist_id in set(expected) | set(stored):
+        want = expected.get(artist_id, empty)
+        have = stored.get(artist_id)
+        current = {field: getattr(have, field) for field in STAT_FIELDS} if have else empty
+
+        changed = False
+        for field in COUNTERS:
+            if current[field] != want[field]:
+                drift[field] += abs(current[field] - want[field])
+                changed = True
+        if current['latest_upload'] != want['latest_upload']:
+            # Counted per artist, since it is a timestamp rather than a total
+            drift['latest_upload'] += 1
+            changed = True
+        if not changed:
+            continue
+
+        drifted.append(artist_id)
+        if dry_run:
+            continue
+        if artist_id not in expected:
+            db.session.delete(have)
+        elif have is None:
+            db.session.add(ArtistStats(artist_id=artist_id, **want))
+        else:
+            for field in STAT_FIELDS:
+                setattr(have, field, want[field])
+
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    return {
+        'artists': len(expected),
+        'drifted': len(drifted),
+        'drift': drift,
+        'examples': sorted(drifted)[:10],
+    }
@@ -0,0 +1,69 @@
+import click
+
+def register_commands(app):
+    """Attach maintenance commands to the `flask` CLI."""
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create missing tables and indexes regardless of the schema stamp."""
+        from app import db
+        from app.schema import ensure_schema
+        
+        ensure_schema(db, force=True)
+        click.echo('Database schema is up to date')
+
+    @app.cli.command('rescore-trending')
+    @click.option('--rebuild', is_flag=True, help='Recompute every score from stored likes and favorites.')
+    def rescore_trending(rebuild):
+        """Compact trending scores onto a fresh epoch (run periodically, e.g. hourly)."""
+        from app import ranking
+        
+        if rebuild:
+            count = ranking.rebuild()
+            click.echo(f'Rebuilt trending scores for {count} artworks')
+        else:
+            ranking.compact()
+            click.echo('Compacted trending scores')
+
+    @app.cli.command('compute-similar')
+    @click.option('--full', is_flag=True, help='Recompute every artwork instead of only those with new favorites.')
+    @click.option('--top-n', default=20, show_default=True, help='Neighbours stored per artwork.')
+    @click.option('--chunk-size', default=256, show_default=True, help='Artworks processed per batch.')
+    def compute_similar(full, top_n, chunk_size):
+        """Precompute "also favorited" neighbours from the favorites table."""
+        from app import recommendations
+        
+        count = recommendations.refresh(full=full, top_n=top_n, chunk_size=chunk_size)
+        click.echo(f'Stored neighbours for {count} artworks')
+
+    @app.cli.command('rebuild-facets')
+    def rebuild_facets():
+        """Recompute gallery filter counts from the artworks table."""
+        from app import facets
+        
+        count = facets.rebuild()
+        click.echo(f'Rebuilt {count} facet counts')
+
+    @app.cli.command('sync-reactions')
+    def sync_reactions():
+        """Create missing like/dislike counter rows on the interactions database."""
+        from app import reactions
+        
+        count = reactions.sync()
+        click.echo(f'Created counters for {count} artworks')
+
+    @app.cli.command('reconcile-artist-stats')
+    @click.option('--dry-run', is_flag=True, help='Report drift without correcting it.')
+    def reconcile_artist_stats(dry_run):
+        """Recompute artist profile totals in bulk and report drift (run e.g. nightly)."""
+        from app import artists
+        
+        report = artists.reconcile(dry_run=dry_run)
+        click.echo(f"Checked {report['artists']} artists, {report['drifted']} drifted")
+        for field, drift in report['drift'].items():
+            if drift:
+                click.echo(f'  {field}: {drift}')
+        if report['examples']:
+            click.echo(f"  e.g. artist ids {', '.join(map(str, report['examples']))}")
+        if report['drifted'] and not dry_run:
+            click.echo('Corrected drifted totals')
@@ -0,0 +1,226 @@
+import base64
+import json
+import os
+import queue
+import threading
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+# Handle imports in a way that works both at runtime and for linters
+try:
+    from app import db
+    from app import reactions
+    from app.models.comment import Comment
+    from app.models.user import User
+except ImportError:
+    # These will be properly imported when the Flask app runs
+    pass
+
+# Posted comments are committed in groups: the writer waits up to this long
+# for more comments to arrive before committing what it has
+COMMIT_WINDOW = float(os.getenv('COMMENT_COMMIT_WINDOW', '0.005'))
+# Largest group committed in one transaction
+MAX_BATCH = int(os.getenv('COMMENT_MAX_BATCH', '200'))
+# How long a request waits for its group to commit before giving up
+COMMIT_TIMEOUT = float(os.getenv('COMMENT_COMMIT_TIMEOUT', '5'))
+# Pending comments held before posting is refused
+MAX_PENDING = int(os.getenv('COMMENT_MAX_PENDING', '5000'))
+
+MAX_CONTENT_LENGTH = 2000
+MAX_IDEMPOTENCY_KEY_LENGTH = 64
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+ORDERS = ('newest', 'oldest')
+
+
+class Backlogged(Exception):
+    """Raised when the writer's queue is full; the comment was not taken."""
+
+
+class CommitPending(Exception):
+    """Raised when a taken comment has not committed in time; it still may."""
+
+
+class PendingComment:
+    def __init__(self, artwork_id, category, artist_id, user_id, content, idempotency_key=None):
+        self.values = {
+            'artwork_id': artwork_id,
+            'user_id': user_id,
+            'content': content,
+            'created_at': datetime.utcnow(),
+            'idempotency_key': idempotency_key,
+        }
+        self.category = category
+        self.artist_id = artist_id
+        self.done = threading.Event()
+        self.comment = None
+        self.error = None
+
+
+class CommentWriter:
+    """Group commit for posted comments.
+
+    Request handlers enqueue a comment and wait; a single writer thread
+    drains the queue and inserts everything that arrived within the window,
+    together with the per-artwork comment_count updates, in one transaction.
+    Under a burst of posts SQLite's write lock is taken once per group
+    instead of once per comment, and the handlers still only answer after
+    their comment is durable.
+    """
+
+    def __init__(self, app, window=COMMIT_WINDOW, max_batch=MAX_BATCH, timeout=COMMIT_TIMEOUT):
+        self.app = app
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=MAX_PENDING)
+        self._lock = threading.Lock()
+        self._writer = None
+        self.batches = 0
+        self.committed = 0
+
+    def post(self, artwork, user_id, content, idempotency_key=None):
+        pending = PendingComment(artwork.id, artwork.category, artwork.artist_id, user_id, content,
+                                 idempotency_key)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            raise Backlogged()
+        self._ensure_writer()
+        if not pending.done.wait(self.timeout):
+            # The comment may still be committed, so the caller must not simply
+            # post it again; resending the idempotency key finds it if it was
+            raise CommitPending()
+        if pending.error is not None:
+            raise pending.error
+        return pending.comment
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name='comment-writer', daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self._queue.get(timeout=self.window))
+            except queue.Empty:
+                pass
+            with self.app.app_context():
+                self.write(batch)
+
+    def write(self, batch):
+        """Insert a group of comments and bump their counters in one commit."""
+        committed = []
+        try:
+            self._commit(batch)
+            committed = batch
+        except Exception:
+            db.session.rollback()
+            # Commit the comments one by one so a bad row fails only its own request
+            for pending in batch:
+                try:
+                    self._commit([pending])
+                    committed.append(pending)
+                except Exception as e:
+                    db.session.rollback()
+                    pending.error = e
+
+        # Past this point the comments are durable; failures here must not
+        # send them back through the retry above and insert them twice
+        try:
+            self._announce(committed)
+        except Exception:
+            current_app.logger.exception('Could not announce %d committed comments', len(committed))
+        finally:
+            db.session.remove()
+            for pending in batch:
+                pending.done.set()
+
+    def _commit(self, batch):
+        comments = [Comment(**pending.values) for pending in batch]
+        db.session.add_all(comments)
+        artworks = {pending.values['artwork_id']: pending for pending in batch}
+        for artwork_id, count in Counter(pending.values['artwork_id'] for pending in batch).items():
+            pending = artworks[artwork_id]
+            reactions.increment_by_id(artwork_id, pending.category, pending.artist_id, comment_count=count)
+        # Read the new ids before committing so nothing after the commit can fail
+        db.session.flush()
+        for pending, comment in zip(batch, comments):
+            pending.comment = comment.to_dict()
+        db.session.commit()
+
+        self.batches += 1
+        self.committed += len(batch)
+
+    def _announce(self, batch):
+        """Invalidate cached details and publish the new counts after a commit."""
+        reactions.announce({pending.values['artwork_id'] for pending in batch})
+
+
+def init_app(app):
+    app.extensions['comment_writer'] = CommentWriter(app)
+
+
+def find(user_id, idempotency_key):
+    """Return the comment a user already posted with this idempotency key, or None."""
+    comment = Comment.query.filter_by(user_id=user_id, idempotency_key=idempotency_key).first()
+    return comment.to_dict() if comment else None
+
+
+def encode_cursor(comment):
+    raw = json.dumps([comment.created_at.isoformat(), comment.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, comment_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(comment_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def page(artwork_id, order='newest', cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Return one page of an artwork's comments and the cursor for the next.
+
+    Keyset pagination on (created_at, id) walks the (artwork_id, created_at,
+    id) index from the cursor, so deep pages cost the same as the first.
+    """
+    query = Comment.query.filter(Comment.artwork_id == artwork_id)
+    if order == 'newest':
+        ordering = (Comment.created_at.desc(), Comment.id.desc())
+    else:
+        ordering = (Comment.created_at.asc(), Comment.id.asc())
+
+    if cursor:
+        created_at, comment_id = decode_cursor(cursor)
+        if order == 'newest':
+            query = query.filter(or_(
+                Comment.created_at < created_at,
+                and_(Comment.created_at == created_at, Comment.id < comment_id)
+            ))
+        else:
+            query = query.filter(or_(
+                Comment.created_at > created_at,
+                and_(Comment.created_at == created_at, Comment.id > comment_id)
+            ))
+
+    # One extra row tells us whether another page exists
+    comments = query.order_by(*ordering).limit(limit + 1).all()
+    next_cursor = encode_cursor(comments[limit - 1]) if len(comments) > limit else None
+    comments = comments[:limit]
+
+    # Users live on the catalog database, so resolve the names in one lookup
+    user_ids = {comment.user_id for comment in comments}
+    usernames = dict(
+        db.session.query(User.id, User.username).filter(User.id.in_(user_ids))
+    ) if user_ids else {}
+    return [comment.to_dict(usernames.get(comment.user_id)) for comment in comments], next_cursor
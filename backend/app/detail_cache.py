@@ -0,0 +1,177 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock; writers then rely on the seqlock alone
+    fcntl = None
+
+# A fixed-slot hash table of pre-serialized artwork detail responses shared by
+# every worker process through a memory-mapped file.
+#
+# Layout: header | one version counter per slot | slots. A slot holds a
+# sequence number, the artwork id, the version the blob was built at and the
+# blob itself. Readers never lock: they take a slot only if its sequence
+# number is even and unchanged across the read (a seqlock) and its version
+# still matches the slot's counter. Writers serialize on flock, and
+# invalidation is just bumping the counter.
+#
+# The header also records which databases the blobs were built from, so a
+# file left behind by another deployment or database is wiped on open.
+
+# Defaults to detail-cache in the app's instance folder (see init_app)
+CACHE_PATH = os.getenv('DETAIL_CACHE_PATH')
+# Set DETAIL_CACHE_SLOTS=0 to disable the cache
+SLOTS = int(os.getenv('DETAIL_CACHE_SLOTS', '4096'))
+SLOT_SIZE = int(os.getenv('DETAIL_CACHE_SLOT_SIZE', '4096'))
+
+# Bump the trailing digit whenever the serialized response format changes so
+# blobs written by an older deploy are discarded
+MAGIC = b'ARTDC003'
+HEADER = struct.Struct('<8s16sII')
+VERSION = struct.Struct('<Q')
+SLOT_HEADER = struct.Struct('<QqQI4x')
+
+
+class DetailCache:
+    def __init__(self, path, slots=SLOTS, slot_size=SLOT_SIZE, key=b''):
+        self.slots = slots
+        self.slot_size = slot_size
+        self.max_blob = slot_size - SLOT_HEADER.size
+        self._versions_offset = HEADER.size
+        self._slots_offset = HEADER.size + slots * VERSION.size
+        size = self._slots_offset + slots * slot_size
+
+        # flock only excludes other processes, so threads in this one also share a lock
+        self._thread_lock = threading.Lock()
+        self._file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o600), 'r+b')
+        with self._locked():
+            self._file.seek(0)
+            header = self._file.read(HEADER.size)
+            if header != HEADER.pack(MAGIC, key, slots, slot_size) or os.path.getsize(path) != size:
+                self._file.truncate(0)
+                self._file.truncate(size)
+                self._file.seek(0)
+                self._file.write(HEADER.pack(MAGIC, key, slots, slot_size))
+                self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def version(self, artwork_id):
+        """Current version stamp; read it before querying the database."""
+        return VERSION.unpack_from(self._map, self._version_offset(artwork_id))[0]
+
+    def get(self, artwork_id):
+        """Return the cached blob, or None on a miss, without taking a lock."""
+        offset = self._slot_offset(artwork_id)
+        version = self.version(artwork_id)
+        seq, cached_id, cached_version, length = SLOT_HEADER.unpack_from(self._map, offset)
+        if seq & 1 or cached_id != artwork_id or cached_version != version or length > self.max_blob:
+            return None
+
+        start = offset + SLOT_HEADER.size
+        blob = self._map[start:start + length]
+
+        # A writer touched the slot while we were copying it
+        if VERSION.unpack_from(self._map, offset)[0] != seq:
+            return None
+        return blob
+
+    def put(self, artwork_id, version, blob):
+        """Store a blob built from data read at version; stale blobs are dropped."""
+        if len(blob) > self.max_blob:
+            return False
+
+        offset = self._slot_offset(artwork_id)
+        with self._locked():
+            if self.version(artwork_id) != version:
+                return False
+
+            seq = VERSION.unpack_from(self._map, offset)[0]
+            VERSION.pack_into(self._map, offset, seq + 1)
+            SLOT_HEADER.pack_into(self._map, offset, seq + 1, artwork_id, version, len(blob))
+            start = offset + SLOT_HEADER.size
+            self._map[start:start + len(blob)] = blob
+            VERSION.pack_into(self._map, offset, seq + 2)
+        return True
+
+    def invalidate(self, artwork_id):
+        offset = self._version_offset(artwork_id)
+        with self._locked():
+            VERSION.pack_into(self._map, offset, VERSION.unpack_from(self._map, offset)[0] + 1)
+
+    def clear(self):
+        """Invalidate every slot, e.g. after writes made outside the routes."""
+        with self._locked():
+            for slot in range(self.slots):
+                offset = self._versions_offset + slot * VERSION.size
+                VERSION.pack_into(self._map, offset, VERSION.unpack_from(self._map, offset)[0] + 1)
+
+    def _version_offset(self, artwork_id):
+        return self._versions_offset + (artwork_id % self.slots) * VERSION.size
+
+    def _slot_offset(self, artwork_id):
+        return self._slots_offset + (artwork_id % self.slots) * self.slot_size
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+
+logger = logging.getLogger(__name__)
+
+_path = CACHE_PATH
+_key = b''
+_cache = None
+_cache_pid = None
+
+def init_app(app):
+    """Point the cache at this app's databases and drop whatever it held.
+
+    Called at every boot: the database may have been reset, restored or
+    changed by maintenance commands since the blobs were written.
+    """
+    global _path, _key, _cache
+    _path = CACHE_PATH or os.path.join(app.instance_path, 'detail-cache')
+    os.makedirs(os.path.dirname(os.path.abspath(_path)), exist_ok=True)
+    databases = [app.config['SQLALCHEMY_DATABASE_URI']] + sorted(app.config.get('SQLALCHEMY_BINDS', {}).values())
+    _key = hashlib.sha256('\n'.join(map(str, databases)).encode()).digest()[:16]
+    _cache = None
+    clear()
+
+def get_cache():
+    """Return this process's mapping of the shared cache, or None if disabled."""
+    global _cache, _cache_pid, _path
+    # A mapping inherited across fork would share the parent's flock, so every
+    # worker opens its own
+    if SLOTS > 0 and _path and (_cache is None or _cache_pid != os.getpid()):
+        try:
+            _cache = DetailCache(_path, key=_key)
+        except OSError:
+            # Serve uncached rather than fail every detail request
+            logger.exception('Cannot open the detail cache at %s; running without it', _path)
+            _cache, _path = None, None
+        _cache_pid = os.getpid()
+    return _cache
+
+def clear():
+    cache = get_cache()
+    if cache is not None:
+        cache.clear()
+
+def invalidate(artwork_id):
+    cache = get_cache()
+    if cache is not None:
+        cache.invalidate(artwork_id)
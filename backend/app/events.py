@@ -0,0 +1,250 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Counter updates are coalesced per artwork and flushed once per window
+COALESCE_WINDOW = float(os.getenv('SSE_COALESCE_WINDOW', '0.25'))
+# Comment lines keep idle connections open through proxies
+HEARTBEAT_INTERVAL = float(os.getenv('SSE_HEARTBEAT_INTERVAL', '15'))
+# Slow subscribers drop their oldest events instead of growing without bound
+SUBSCRIBER_QUEUE_SIZE = 64
+# Relayed events are kept this many seconds for workers that fall behind
+CHANNEL_RETENTION = 60
+
+
+class Subscription:
+    def __init__(self, artwork_id=None, category=None):
+        self.artwork_id = artwork_id
+        self.category = category
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def push(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(message)
+
+
+class EventChannel:
+    """Relay of coalesced payloads between worker processes through SQLite.
+
+    Each worker's flusher appends what it coalesced during the last window
+    and reads back everything appended since its previous read, its own rows
+    included, so a like handled by one worker reaches the streams held by
+    every other. That is one small write per worker and window, however many
+    likes were coalesced into it.
+    """
+
+    def __init__(self, path, retention=CHANNEL_RETENTION):
+        self.path = path
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._last_id = 0
+        self._trimmed = 0.0
+
+    def exchange(self, payloads):
+        """Append this worker's payloads; return all payloads appended since the last call."""
+        with self._lock:
+            connection = self._connect()
+            now = time.time()
+            if payloads:
+                connection.execute('BEGIN IMMEDIATE')
+                try:
+                    connection.executemany(
+                        'INSERT INTO events (payload, created) VALUES (?, ?)',
+                        [(json.dumps(payload), now) for payload in payloads]
+                    )
+                    if now - self._trimmed > self.retention / 4:
+                        connection.execute('DELETE FROM events WHERE created < ?', (now - self.retention,))
+                        self._trimmed = now
+                    connection.execute('COMMIT')
+                except sqlite3.Error:
+                    connection.execute('ROLLBACK')
+                    raise
+
+            # Writers are serialized, so ids are committed in order and
+            # nothing can appear below the last id read
+            rows = connection.execute(
+                'SELECT id, payload FROM events WHERE id > ? ORDER BY id', (self._last_id,)
+            ).fetchall()
+            if rows:
+                self._last_id = rows[-1][0]
+            return [json.loads(payload) for _, payload in rows]
+
+    def _connect(self):
+        # Connections must not cross fork, so every worker opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=1.0, isolation_level=None, check_same_thread=False
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            # Events are transient; losing the last few on power failure is fine
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS events '
+                '(id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, created REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_events_created ON events (created)')
+            # Start from now rather than replaying what was relayed before this worker started
+            self._last_id = connection.execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+
+class EventBroker:
+    """Fan-out of artwork counter updates to SSE subscribers.
+
+    Publishers only merge the latest counts into a pending map, so a burst of
+    likes on one artwork costs one dict update each and produces a single
+    event per window. A background flusher relays the coalesced payloads
+    through the channel shared by all workers, then hands what every worker
+    published to the local subscriber queues. Run the app under gevent so
+    that each open stream is a greenlet waiting on its queue rather than an
+    OS thread.
+    """
+
+    def __init__(self, window=COALESCE_WINDOW, channel=None):
+        self.window = window
+        self.channel = channel
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._by_artwork = {}
+        self._by_category = {}
+        self._firehose = set()
+        self._flusher = None
+
+    def subscribe(self, artwork_id=None, category=None):
+        subscription = Subscription(artwork_id, category)
+        with self._lock:
+            if artwork_id is not None:
+                self._by_artwork.setdefault(artwork_id, set()).add(subscription)
+            elif category is not None:
+                self._by_category.setdefault(category, set()).add(subscription)
+            else:
+                self._firehose.add(subscription)
+            # Other workers' updates arrive through the flusher too
+            self._ensure_flusher()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription.artwork_id is not None:
+                self._discard(self._by_artwork, subscription.artwork_id, subscription)
+            elif subscription.category is not None:
+                self._discard(self._by_category, subscription.category, subscription)
+            else:
+                self._firehose.discard(subscription)
+
+    def publish(self, artwork_id, category=None, **counts):
+        with self._lock:
+            payload = self._pending.setdefault(artwork_id, {'artwork_id': artwork_id})
+            if category is not None:
+                payload['category'] = category
+            payload.update(counts)
+            self._ensure_flusher()
+
+    def subscriber_count(self):
+        with self._lock:
+            return (sum(len(s) for s in self._by_artwork.values())
+                    + sum(len(s) for s in self._by_category.values())
+                    + len(self._firehose))
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        payloads = list(pending.values())
+
+        if self.channel is not None:
+            try:
+                payloads = self.channel.exchange(payloads)
+            except sqlite3.Error:
+                # Still deliver this worker's own updates locally
+                logger.exception('Could not relay counter events through %s', self.channel.path)
+
+        # Coalesce again, since several workers may report the same artwork
+        merged = {}
+        for payload in payloads:
+            merged.setdefault(payload['artwork_id'], {}).update(payload)
+
+        with self._lock:
+            deliveries = []
+            for artwork_id, payload in merged.items():
+                targets = set(self._by_artwork.get(artwork_id, ()))
+                targets.update(self._by_category.get(payload.get('category'), ()))
+                targets.update(self._firehose)
+                if targets:
+                    deliveries.append((format_event('counts', payload), targets))
+
+        for message, targets in deliveries:
+            for subscription in targets:
+                subscription.push(message)
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._run, name='sse-flusher', daemon=True)
+            self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.window)
+            self.flush()
+
+    @staticmethod
+    def _discard(index, key, subscription):
+        subscribers = index.get(key)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del index[key]
+
+
+def format_event(event, payload):
+    payload = dict(payload, sent_at=time.time())
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def stream(subscription):
+    """Yield SSE frames for a subscription until the client disconnects."""
+    try:
+        yield f"retry: {int(COALESCE_WINDOW * 1000) + 2000}\n\n"
+        while True:
+            try:
+                yield subscription.queue.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+
+broker = EventBroker()
+
+
+def init_app(app):
+    """Relay events between this app's workers through SSE_CHANNEL_PATH."""
+    path = os.getenv('SSE_CHANNEL_PATH') or os.path.join(app.instance_path, 'events.db')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    broker.channel = EventChannel(path)
+
+
+def publish_counts(artwork, **extra):
+    """Publish the current like/dislike counts of an artwork."""
+    broker.publish(
+        artwork.id,
+        artwork.category,
+        likes=artwork.likes,
+        dislikes=artwork.dislikes,
+        **extra
+    )
@@ -0,0 +1,136 @@
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+# Handle imports in a way that works both at runtime and for linters
+try:
+    from app import db
+    from app.models.artwork import Artwork
+    from app.models.facet import FacetCount
+except ImportError:
+    # These will be properly imported when the Flask app runs
+    pass
+
+FACETS = ('category', 'medium', 'year')
+
+# Facets counted within each scope; a category scope does not count categories
+SCOPED_FACETS = {
+    '': FACETS,
+    'artist': FACETS,
+    'category': ('medium', 'year'),
+}
+
+def snapshot(artwork):
+    """Capture the facet-relevant fields of an artwork before it changes."""
+    return {
+        'artist_id': artwork.artist_id,
+        'category': artwork.category,
+        'medium': artwork.medium,
+        'year': artwork.year,
+    }
+
+def _keys(values):
+    scopes = [('', ''), ('artist', str(values['artist_id']))]
+    if values['category']:
+        scopes.append(('category', values['category']))
+    
+    for scope, scope_value in scopes:
+        for facet in SCOPED_FACETS[scope]:
+            if values[facet] not in (None, ''):
+                yield scope, scope_value, facet, str(values[facet])
+
+def apply(values, delta):
+    """Adjust the counts for a snapshot by delta in the current transaction."""
+    for scope, scope_value, facet, value in _keys(values):
+        key = FacetCount.query.filter_by(scope=scope, scope_value=scope_value, facet=facet, value=value)
+        updated = key.update({FacetCount.count: FacetCount.count + delta}, synchronize_session=False)
+        if updated or delta <= 0:
+            continue
+
+        # Another transaction can insert the same row between the UPDATE and
+        # the INSERT, so on a duplicate key add to the row it inserted instead
+        try:
+            with db.session.begin_nested():
+                db.session.add(FacetCount(
+                    scope=scope, scope_value=scope_value, facet=facet, value=value, count=delta
+                ))
+        except IntegrityError:
+            key.update({FacetCount.count: FacetCount.count + delta}, synchronize_session=False)
+
+def move(before, after):
+    """Move an artwork's counts from one snapshot to another."""
+    if before != after:
+        apply(before, -1)
+        apply(after, 1)
+
+def remove_artist(artist_id):
+    """Subtract all of an artist's artworks in a few set-based statements."""
+    artist_value = str(artist_id)
+    for scope in ('', 'category'):
+        for facet in SCOPED_FACETS[scope]:
+            facet_column = getattr(Artwork, facet)
+            columns = [facet_column] if scope == '' else [Artwork.category, facet_column]
+            conditions = [Artwork.artist_id == artist_id] + [c.isnot(None) for c in columns]
+            conditions += [c != '' for c in columns if isinstance(c.type, db.String)]
+            rows = db.session.query(*columns, func.count(Artwork.id)).filter(
+                *conditions
+            ).group_by(*columns).all()
+            
+            for row in rows:
+                FacetCount.query.filter_by(
+                    scope=scope,
+                    scope_value='' if scope == '' else row[0],
+                    facet=facet,
+                    value=str(row[-2])
+                ).update({FacetCount.count: FacetCount.count - row[-1]}, synchronize_session=False)
+    
+    FacetCount.query.filter_by(scope='artist', scope_value=artist_value).delete(synchronize_session=False)
+
+def counts(scope='', scope_value=''):
+    """Return {facet: {value: count}} for a scope from the aggregate table."""
+    result = {facet: {} for facet in SCOPED_FACETS[scope]}
+    rows = db.session.query(FacetCount.facet, FacetCount.value, FacetCount.count).filter(
+        FacetCount.scope == scope,
+        FacetCount.scope_value == scope_value,
+        FacetCount.count > 0
+    )
+    for facet, value, count in rows:
+        if facet == 'year':
+            # Years stored as text before they were validated are left out
+            if not value.lstrip('-').isdigit():
+                continue
+            value = int(value)
+        result[facet][value] = count
+    return result
+
+def rebuild():
+    """Recompute every facet count from the artworks table."""
+    FacetCount.query.delete(synchronize_session=False)
+    
+    scope_columns = {
+        '': None,
+        'artist': Artwork.artist_id,
+        'category': Artwork.category,
+    }
+    rows = 0
+    for scope, scope_column in scope_columns.items():
+        for facet in SCOPED_FACETS[scope]:
+            facet_column = getattr(Artwork, facet)
+            columns = [facet_column] if scope_column is None else [scope_column, facet_column]
+            # Skip missing values the same way apply() does
+            conditions = [c.isnot(None) for c in columns]
+            conditions += [c != '' for c in columns if isinstance(c.type, db.String)]
+            query = db.session.query(*columns, func.count(Artwork.id)).filter(
+                *conditions
+            ).group_by(*columns)
+            
+            mappings = []
+            for row in query:
+                scope_value = '' if scope_column is None else str(row[0])
+                mappings.append({
+                    'scope': scope, 'scope_value': scope_value,
+                    'facet': facet, 'value': str(row[-2]), 'count': row[-1]
+                })
+            db.session.bulk_insert_mappings(FacetCount, mappings)
+            rows += len(mappings)
+    db.session.commit()
+    return rows
@@ -0,0 +1,28 @@
+# create_app imports the models after app.db exists, so this is not circular
+from app import db
+
+def set_db(database):
+    global db
+    db = database
+
+class ArtistStats(db.Model):
+    __tablename__ = 'artist_stats'
+    # Updated on every like and favorite, so it sits with the other counters
+    __bind_key__ = 'interactions'
+    
+    # No foreign key: users live on the catalog database
+    artist_id = db.Column(db.Integer, primary_key=True)
+    artwork_count = db.Column(db.Integer, default=0, nullable=False)
+    likes = db.Column(db.Integer, default=0, nullable=False)
+    dislikes = db.Column(db.Integer, default=0, nullable=False)
+    favorites = db.Column(db.Integer, default=0, nullable=False)
+    latest_upload = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        return {
+            'artwork_count': self.artwork_count,
+            'likes': self.likes,
+            'dislikes': self.dislikes,
+            'favorites': self.favorites,
+            'latest_upload': self.latest_upload.isoformat() if self.latest_upload else None
+        }
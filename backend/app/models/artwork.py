@@ -1,7 +1,7 @@
 from datetime import datetime
 
-# Import db using a function to avoid circular import
-db = None  # This will be replaced by the set_db function
+# create_app imports the models after app.db exists, so this is not circular
+from app import db
 
 def set_db(database):
     global db
@@ -14,33 +14,72 @@ class Artwork(db.Model):
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
     image_url = db.Column(db.String(255), nullable=False)
-    artist_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     category = db.Column(db.String(50), nullable=True)
     medium = db.Column(db.String(50), nullable=True)
     dimensions = db.Column(db.String(50), nullable=True)
     year = db.Column(db.Integer, nullable=True)
     location = db.Column(db.String(100), nullable=True)
-    likes = db.Column(db.Integer, default=0)
-    dislikes = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Relationships
-    favorites = db.relationship('Favorite', backref='artwork', lazy=True, cascade="all, delete-orphan")
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'image_url': self.image_url,
-            'artist_id': self.artist_id,
-            'artist_name': self.artist.username if self.artist else None,
-            'category': self.category,
-            'medium': self.medium,
-            'dimensions': self.dimensions,
-            'year': self.year,
-            'location': self.location,
-            'likes': self.likes,
-            'dislikes': self.dislikes,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        } 
\ No newline at end of file
+    # Like/dislike counters live in ArtworkReaction on the interactions database.
+    # Set by app.reactions.attach() to batch the lookup for a list of artworks.
+    _reaction = None
+    _reaction_loaded = False
+    
+    @property
+    def reaction(self):
+        if not self._reaction_loaded:
+            from app.models.reaction import ArtworkReaction
+            self._reaction = ArtworkReaction.query.get(self.id)
+            self._reaction_loaded = True
+        return self._reaction
+    
+    @property
+    def likes(self):
+        return self.reaction.likes if self.reaction else 0
+    
+    @property
+    def dislikes(self):
+        return self.reaction.dislikes if self.reaction else 0
+    
+    @property
+    def comment_count(self):
+        return self.reaction.comment_count if self.reaction else 0
+    
+    @staticmethod
+    def query_options(fields=None):
+        """Loader options that fetch only the columns needed for fields."""
+        from sqlalchemy.orm import joinedload, load_only
+        from app.models.user import User
+        
+        fields = fields or ARTWORK_FIELDS
+        options = []
+        columns = [getattr(Artwork, f) for f in fields if f in ARTWORK_COLUMNS]
+        if len(columns) < len(ARTWORK_COLUMNS):
+            options.append(load_only(Artwork.id, *columns))
+        if 'artist_name' in fields:
+            options.append(joinedload(Artwork.artist).load_only(User.id, User.username))
+        return options
+    
+    def to_dict(self, fields=None):
+        # Only touch requested attributes so deferred columns are never loaded
+        data = {'id': self.id}
+        for field in fields or ARTWORK_FIELDS:
+            if field == 'artist_name':
+                data[field] = self.artist.username if self.artist else None
+            elif field == 'created_at':
+                data[field] = self.created_at.isoformat() if self.created_at else None
+            else:
+                data[field] = getattr(self, field)
+        return data
+
+# Fields that can be requested with the fields= query parameter
+ARTWORK_FIELDS = (
+    'id', 'title', 'description', 'image_url', 'artist_id', 'artist_name', 'category',
+    'medium', 'dimensions', 'year', 'location', 'likes', 'dislikes', 'comment_count', 'created_at'
+)
+# Counters that come from ArtworkReaction rather than the artworks table
+COUNTER_FIELDS = ('likes', 'dislikes', 'comment_count')
+# artist_name comes from the joined artist
+ARTWORK_COLUMNS = tuple(f for f in ARTWORK_FIELDS if f != 'artist_name' and f not in COUNTER_FIELDS)
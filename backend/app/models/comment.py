@@ -0,0 +1,38 @@
+from datetime import datetime
+
+# create_app imports the models after app.db exists, so this is not circular
+from app import db
+
+def set_db(database):
+    global db
+    db = database
+
+class Comment(db.Model):
+    __tablename__ = 'comments'
+    # Comments are append-heavy, so they live with the other interactions
+    __bind_key__ = 'interactions'
+    
+    # No foreign keys: users and artworks live on the catalog database
+    id = db.Column(db.Integer, primary_key=True)
+    artwork_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Sent by the client so a retried post returns the comment instead of adding another
+    idempotency_key = db.Column(db.String(64), nullable=True)
+    
+    __table_args__ = (
+        # Serves cursor pagination in both directions without a sort
+        db.Index('ix_comments_artwork_created', 'artwork_id', 'created_at', 'id'),
+        db.Index('ux_comments_user_idempotency_key', 'user_id', 'idempotency_key', unique=True),
+    )
+    
+    def to_dict(self, username=None):
+        return {
+            'id': self.id,
+            'artwork_id': self.artwork_id,
+            'user_id': self.user_id,
+            'username': username,
+            'content': self.content,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
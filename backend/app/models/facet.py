@@ -0,0 +1,16 @@
+# create_app imports the models after app.db exists, so this is not circular
+from app import db
+
+def set_db(database):
+    global db
+    db = database
+
+class FacetCount(db.Model):
+    __tablename__ = 'facet_counts'
+    
+    # Scope is '' for the whole gallery, or 'artist' / 'category' with its value
+    scope = db.Column(db.String(20), primary_key=True)
+    scope_value = db.Column(db.String(50), primary_key=True)
+    facet = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
@@ -1,7 +1,7 @@
 from datetime import datetime
 
-# Import db using a function to avoid circular import
-db = None  # This will be replaced by the set_db function
+# create_app imports the models after app.db exists, so this is not circular
+from app import db
 
 def set_db(database):
     global db
@@ -9,10 +9,14 @@ def set_db(database):
 
 class Favorite(db.Model):
     __tablename__ = 'favorites'
+    # Favorites take most of the writes, so they can live on their own database
+    __bind_key__ = 'interactions'
     
+    # No foreign keys: users and artworks live on the catalog database, so
+    # deleting them removes favorites explicitly (see app.reactions.remove)
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    artwork_id = db.Column(db.Integer, db.ForeignKey('artworks.id'), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    artwork_id = db.Column(db.Integer, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Ensure a user can only favorite an artwork once
@@ -0,0 +1,15 @@
+# create_app imports the models after app.db exists, so this is not circular
+from app import db
+
+def set_db(database):
+    global db
+    db = database
+
+class RankingState(db.Model):
+    __tablename__ = 'ranking_state'
+    # Read on every reaction, so it sits next to the scores it describes
+    __bind_key__ = 'interactions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Unix time that stored popularity scores are expressed relative to
+    epoch = db.Column(db.Float, nullable=False)
@@ -0,0 +1,29 @@
+# create_app imports the models after app.db exists, so this is not circular
+from app import db
+
+def set_db(database):
+    global db
+    db = database
+
+class ArtworkReaction(db.Model):
+    __tablename__ = 'artwork_reactions'
+    # Lives with favorites on the write-heavy interactions database
+    __bind_key__ = 'interactions'
+    
+    # No foreign key: artworks live on the catalog database
+    artwork_id = db.Column(db.Integer, primary_key=True)
+    # Copied from the artwork so ranked listings can filter without a cross-database join
+    category = db.Column(db.String(50), nullable=True)
+    artist_id = db.Column(db.Integer, nullable=True)
+    likes = db.Column(db.Integer, default=0, nullable=False, index=True)
+    dislikes = db.Column(db.Integer, default=0, nullable=False)
+    comment_count = db.Column(db.Integer, default=0, nullable=False)
+    # Time-decayed popularity, maintained incrementally by app.ranking
+    popularity_score = db.Column(db.Float, default=0.0, nullable=False, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_artwork_reactions_category_popularity', 'category', 'popularity_score'),
+        db.Index('ix_artwork_reactions_category_likes', 'category', 'likes'),
+        db.Index('ix_artwork_reactions_artist_popularity', 'artist_id', 'popularity_score'),
+        db.Index('ix_artwork_reactions_artist_likes', 'artist_id', 'likes'),
+    )
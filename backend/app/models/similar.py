@@ -0,0 +1,17 @@
+from datetime import datetime
+
+# create_app imports the models after app.db exists, so this is not circular
+from app import db
+
+def set_db(database):
+    global db
+    db = database
+
+class SimilarArtwork(db.Model):
+    __tablename__ = 'similar_artworks'
+    
+    # One row per artwork so serving neighbours is a primary key lookup
+    artwork_id = db.Column(db.Integer, db.ForeignKey('artworks.id', ondelete='CASCADE'), primary_key=True)
+    # JSON list of [artwork_id, similarity] pairs, most similar first
+    neighbors = db.Column(db.Text, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
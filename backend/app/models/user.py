@@ -1,8 +1,8 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
-# Import db using a function to avoid circular import
-db = None  # This will be replaced by the set_db function
+# create_app imports the models after app.db exists, so this is not circular
+from app import db
 
 def set_db(database):
     global db
@@ -19,8 +19,9 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
-    artworks = db.relationship('Artwork', backref='artist', lazy=True, cascade="all, delete-orphan")
-    favorites = db.relationship('Favorite', backref='user', lazy=True, cascade="all, delete-orphan")
+    # Artworks are removed by ON DELETE CASCADE instead of being loaded and deleted one by one.
+    # Favorites live on the interactions database and are removed by app.accounts.
+    artworks = db.relationship('Artwork', backref='artist', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
     
     def __init__(self, username, email, is_artist=False):
         self.username = username
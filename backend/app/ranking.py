@@ -0,0 +1,139 @@
+import math
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+
+# Handle imports in a way that works both at runtime and for linters
+try:
+    from app import db
+    from app.models.artwork import Artwork
+    from app.models.favorite import Favorite
+    from app.models.ranking import RankingState
+    from app.models.reaction import ArtworkReaction
+except ImportError:
+    # These will be properly imported when the Flask app runs
+    pass
+
+# An interaction loses half of its weight every TRENDING_HALF_LIFE_HOURS
+HALF_LIFE = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '48')) * 3600
+DECAY_RATE = math.log(2) / HALF_LIFE
+
+EVENT_WEIGHTS = {
+    'like': 1.0,
+    'dislike': -1.0,
+    'favorite': 3.0,
+    'unfavorite': -3.0,
+}
+
+# Scores this close to zero are dropped during compaction
+NEGLIGIBLE_SCORE = 1e-6
+
+# Decaying every stored score on every request would rewrite the whole table,
+# so scores are kept relative to a fixed epoch instead: an event at time t adds
+# weight * exp(DECAY_RATE * (t - epoch)). The decayed score at time now is the
+# stored value times exp(-DECAY_RATE * (now - epoch)), a factor shared by all
+# artworks, so ordering by the stored column is ordering by decayed score.
+
+def _state():
+    # ensure_schema creates the row, so first events never race to insert it
+    return RankingState.query.get(1)
+
+def create_state(connection):
+    """Create the epoch row on a new interactions database."""
+    if connection.execute(select(RankingState.id).where(RankingState.id == 1)).first() is None:
+        connection.execute(RankingState.__table__.insert().values(id=1, epoch=time.time()))
+
+def event_weight(kind, now=None):
+    """What an event at time now adds to the stored score."""
+    now = time.time() if now is None else now
+    return EVENT_WEIGHTS[kind] * math.exp(DECAY_RATE * (now - _state().epoch))
+
+def favorite_time(favorite_created_at):
+    """The time to weigh a removed favorite at: when it was added, so it is taken back exactly."""
+    return timestamp(favorite_created_at) if favorite_created_at else None
+
+def record_event(artwork_id, kind, now=None):
+    """Add an interaction to an artwork's score in the current transaction."""
+    delta = event_weight(kind, now)
+    db.session.execute(
+        update(ArtworkReaction)
+        .where(ArtworkReaction.artwork_id == artwork_id)
+        .values(popularity_score=ArtworkReaction.popularity_score + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+def compact(now=None):
+    """Rebase stored scores onto a new epoch so they stay small.
+
+    Run this periodically; without it stored scores grow by a factor of two
+    every half-life and eventually lose precision.
+    """
+    now = time.time() if now is None else now
+    state = _state()
+    factor = math.exp(-DECAY_RATE * (now - state.epoch))
+    db.session.execute(
+        update(ArtworkReaction)
+        .values(popularity_score=ArtworkReaction.popularity_score * factor)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(ArtworkReaction)
+        .where(func.abs(ArtworkReaction.popularity_score) < NEGLIGIBLE_SCORE)
+        .values(popularity_score=0.0)
+        .execution_options(synchronize_session=False)
+    )
+    state.epoch = now
+    db.session.commit()
+
+def rebuild(now=None):
+    """Recompute every score from stored data.
+
+    Favorites carry their own timestamps. Likes and dislikes are only stored as
+    totals, so they are counted as of the artwork's creation time.
+    """
+    now = time.time() if now is None else now
+    state = _state()
+    state.epoch = now
+    db.session.execute(
+        update(ArtworkReaction).values(popularity_score=0.0).execution_options(synchronize_session=False)
+    )
+
+    # Counters and creation times live on different databases
+    created = dict(db.session.query(Artwork.id, Artwork.created_at).yield_per(1000))
+    scores = {}
+    known = set()
+    for artwork_id, likes, dislikes in db.session.query(
+        ArtworkReaction.artwork_id, ArtworkReaction.likes, ArtworkReaction.dislikes
+    ).yield_per(1000):
+        known.add(artwork_id)
+        weight = (likes or 0) * EVENT_WEIGHTS['like'] + (dislikes or 0) * EVENT_WEIGHTS['dislike']
+        if weight:
+            scores[artwork_id] = weight * _decay_since(created.get(artwork_id), now)
+
+    for artwork_id, created_at in db.session.query(
+        Favorite.artwork_id, Favorite.created_at
+    ).yield_per(1000):
+        if artwork_id not in known:
+            continue
+        scores[artwork_id] = (
+            scores.get(artwork_id, 0.0) + EVENT_WEIGHTS['favorite'] * _decay_since(created_at, now)
+        )
+
+    db.session.bulk_update_mappings(
+        ArtworkReaction,
+        [{'artwork_id': artwork_id, 'popularity_score': score} for artwork_id, score in scores.items()]
+    )
+    db.session.commit()
+    return len(scores)
+
+def timestamp(created_at):
+    """Seconds since the epoch for the naive UTC datetimes stored by the models."""
+    return (created_at - datetime(1970, 1, 1)).total_seconds()
+
+def _decay_since(created_at, now):
+    if created_at is None:
+        return 1.0
+    age = max(0.0, now - timestamp(created_at))
+    return math.exp(-DECAY_RATE * age)
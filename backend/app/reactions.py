@@ -0,0 +1,192 @@
+from sqlalchemy import case, func, inspect, text
+
+# Handle imports in a way that works both at runtime and for linters
+try:
+    from app import db
+    from app import detail_cache, ranking
+    from app.events import broker
+    from app.models.artwork import Artwork, COUNTER_FIELDS
+    from app.models.comment import Comment
+    from app.models.favorite import Favorite
+    from app.models.reaction import ArtworkReaction
+except ImportError:
+    # These will be properly imported when the Flask app runs
+    pass
+
+# Largest IN list sent in one statement when joining across databases by id
+ID_BATCH_SIZE = 500
+
+# Ranked listings read ids off these indexes, then fetch the artworks by id
+RANKED_ORDERS = {
+    'trending': lambda: (ArtworkReaction.popularity_score.desc(), ArtworkReaction.artwork_id.desc()),
+    'popular': lambda: (ArtworkReaction.likes.desc(), ArtworkReaction.artwork_id.desc()),
+}
+
+def create(artwork):
+    """Start the counters of a new artwork at zero."""
+    if artwork.id is None:
+        db.session.flush()
+    db.session.add(ArtworkReaction(
+        artwork_id=artwork.id, category=artwork.category, artist_id=artwork.artist_id,
+        likes=0, dislikes=0, comment_count=0, popularity_score=0.0
+    ))
+
+def set_category(artwork_id, category):
+    ArtworkReaction.query.filter_by(artwork_id=artwork_id).update(
+        {ArtworkReaction.category: category}, synchronize_session=False
+    )
+
+def increment(artwork, **deltas):
+    """Atomically add to an artwork's counters, e.g. increment(artwork, likes=1)."""
+    increment_by_id(artwork.id, artwork.category, artwork.artist_id, **deltas)
+    artwork._reaction_loaded = False
+
+def increment_by_id(artwork_id, category=None, artist_id=None, **deltas):
+    """increment() for callers that only hold the artwork id."""
+    values = {getattr(ArtworkReaction, name): getattr(ArtworkReaction, name) + delta
+              for name, delta in deltas.items()}
+    updated = ArtworkReaction.query.filter_by(artwork_id=artwork_id).update(
+        values, synchronize_session=False
+    )
+    if not updated:
+        # Artworks from before the split get their row on first use
+        db.session.add(ArtworkReaction(
+            artwork_id=artwork_id, category=category, artist_id=artist_id,
+            **dict({'likes': 0, 'dislikes': 0, 'comment_count': 0, 'popularity_score': 0.0}, **deltas)
+        ))
+
+def attach(artworks, fields=None):
+    """Load the counters for a list of artworks with batched id lookups."""
+    if fields is not None and not set(COUNTER_FIELDS) & set(fields):
+        return artworks
+
+    ids = [artwork.id for artwork in artworks]
+    reactions = {}
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        for reaction in ArtworkReaction.query.filter(
+            ArtworkReaction.artwork_id.in_(ids[start:start + ID_BATCH_SIZE])
+        ):
+            reactions[reaction.artwork_id] = reaction
+
+    for artwork in artworks:
+        artwork._reaction = reactions.get(artwork.id)
+        artwork._reaction_loaded = True
+    return artworks
+
+def ranked_ids(sort, category=None, artist_id=None, limit=20, offset=0):
+    """Return one page of artwork ids in trending or popular order."""
+    query = db.session.query(ArtworkReaction.artwork_id)
+    if category:
+        query = query.filter(ArtworkReaction.category == category)
+    if artist_id is not None:
+        query = query.filter(ArtworkReaction.artist_id == artist_id)
+    return [row[0] for row in query.order_by(*RANKED_ORDERS[sort]()).limit(limit).offset(offset)]
+
+def fetch_in_order(ids, options=()):
+    """Fetch artworks from the catalog by id, keeping the order of ids."""
+    found = {}
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        for artwork in Artwork.query.options(*options).filter(Artwork.id.in_(ids[start:start + ID_BATCH_SIZE])):
+            found[artwork.id] = artwork
+    return [found[artwork_id] for artwork_id in ids if artwork_id in found]
+
+def remove(artwork_ids=(), user_id=None):
+    """Delete interaction rows for deleted artworks and/or a deleted user.
+
+    The interactions database has no foreign keys into the catalog, so this
+    takes the place of ON DELETE CASCADE with set-based deletes per id batch.
+    Returns the ids of remaining artworks whose counters changed, to pass to
+    announce() after the commit.
+    """
+    artwork_ids = list(artwork_ids)
+    changed = set()
+    for start in range(0, len(artwork_ids), ID_BATCH_SIZE):
+        batch = artwork_ids[start:start + ID_BATCH_SIZE]
+        Favorite.query.filter(Favorite.artwork_id.in_(batch)).delete(synchronize_session=False)
+        Comment.query.filter(Comment.artwork_id.in_(batch)).delete(synchronize_session=False)
+        ArtworkReaction.query.filter(ArtworkReaction.artwork_id.in_(batch)).delete(synchronize_session=False)
+    if user_id is not None:
+        # Take back what each of the user's favorites added to a score, as
+        # unfavoriting does, in one UPDATE per batch of artworks
+        taken_back = {
+            artwork_id: ranking.event_weight('unfavorite', ranking.favorite_time(created_at))
+            for artwork_id, created_at in db.session.query(Favorite.artwork_id, Favorite.created_at).filter(
+                Favorite.user_id == user_id
+            )
+        }
+        favorited = list(taken_back)
+        for start in range(0, len(favorited), ID_BATCH_SIZE):
+            batch = favorited[start:start + ID_BATCH_SIZE]
+            ArtworkReaction.query.filter(ArtworkReaction.artwork_id.in_(batch)).update({
+                ArtworkReaction.popularity_score: ArtworkReaction.popularity_score + case(
+                    {artwork_id: taken_back[artwork_id] for artwork_id in batch},
+                    value=ArtworkReaction.artwork_id, else_=0.0
+                )
+            }, synchronize_session=False)
+        changed.update(favorited)
+        Favorite.query.filter(Favorite.user_id == user_id).delete(synchronize_session=False)
+        # Take the user's comments off the counters of artworks that remain
+        per_artwork = db.session.query(Comment.artwork_id, db.func.count(Comment.id)).filter(
+            Comment.user_id == user_id
+        ).group_by(Comment.artwork_id).all()
+        for artwork_id, count in per_artwork:
+            ArtworkReaction.query.filter_by(artwork_id=artwork_id).update(
+                {ArtworkReaction.comment_count: ArtworkReaction.comment_count - count},
+                synchronize_session=False
+            )
+            changed.add(artwork_id)
+        Comment.query.filter(Comment.user_id == user_id).delete(synchronize_session=False)
+    return changed
+
+def announce(artwork_ids):
+    """Invalidate cached details and publish the counters of artworks changed in bulk."""
+    artwork_ids = list(artwork_ids)
+    for start in range(0, len(artwork_ids), ID_BATCH_SIZE):
+        batch = artwork_ids[start:start + ID_BATCH_SIZE]
+        favorites = dict(db.session.query(Favorite.artwork_id, func.count(Favorite.id)).filter(
+            Favorite.artwork_id.in_(batch)
+        ).group_by(Favorite.artwork_id))
+        for reaction in ArtworkReaction.query.filter(ArtworkReaction.artwork_id.in_(batch)):
+            detail_cache.invalidate(reaction.artwork_id)
+            broker.publish(reaction.artwork_id, reaction.category, comment_count=reaction.comment_count,
+                           favorites=favorites.get(reaction.artwork_id, 0))
+
+def sync():
+    """Create missing reaction rows and refresh their categories and artists.
+
+    Counters still stored on the artworks table by databases created before
+    the split are carried over the first time a row is created.
+    """
+    catalog = db.engines[None]
+    legacy = {c['name'] for c in inspect(catalog).get_columns('artworks')} >= {'likes', 'dislikes'}
+
+    with catalog.connect() as connection:
+        if legacy:
+            rows = connection.execute(text('SELECT id, category, artist_id, likes, dislikes FROM artworks'))
+        else:
+            rows = connection.execute(text('SELECT id, category, artist_id, 0, 0 FROM artworks'))
+        catalog_rows = rows.fetchall()
+
+    existing = {
+        artwork_id: (category, artist_id)
+        for artwork_id, category, artist_id in db.session.query(
+            ArtworkReaction.artwork_id, ArtworkReaction.category, ArtworkReaction.artist_id
+        )
+    }
+    created = 0
+    for artwork_id, category, artist_id, likes, dislikes in catalog_rows:
+        if artwork_id not in existing:
+            db.session.add(ArtworkReaction(
+                artwork_id=artwork_id, category=category, artist_id=artist_id,
+                likes=likes or 0, dislikes=dislikes or 0, popularity_score=0.0
+            ))
+            created += 1
+        elif existing[artwork_id] != (category, artist_id):
+            ArtworkReaction.query.filter_by(artwork_id=artwork_id).update(
+                {ArtworkReaction.category: category, ArtworkReaction.artist_id: artist_id},
+                synchronize_session=False
+            )
+    db.session.commit()
+    # Cached details carry the counters that were just copied over
+    detail_cache.clear()
+    return created
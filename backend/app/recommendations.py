@@ -0,0 +1,154 @@
+import json
+from array import array
+from datetime import datetime
+
+from sqlalchemy import func
+
+# Handle imports in a way that works both at runtime and for linters
+try:
+    from app import db
+    from app.models.favorite import Favorite
+    from app.models.similar import SimilarArtwork
+except ImportError:
+    # These will be properly imported when the Flask app runs
+    pass
+
+DEFAULT_TOP_N = 20
+# Number of artworks whose similarity column is computed at once. Memory use
+# is bounded by this times the number of artworks that co-occur with them.
+DEFAULT_CHUNK_SIZE = 256
+# Pairs favorited together by fewer users than this are ignored as noise
+DEFAULT_MIN_SUPPORT = 2
+FETCH_SIZE = 50000
+
+def load_favorites():
+    """Stream the favorites table into two int32 arrays of (user, artwork)."""
+    user_ids = array('i')
+    artwork_ids = array('i')
+    result = db.session.execute(
+        db.select(Favorite.user_id, Favorite.artwork_id).execution_options(yield_per=FETCH_SIZE)
+    )
+    for rows in result.partitions(FETCH_SIZE):
+        for user_id, artwork_id in rows:
+            user_ids.append(user_id)
+            artwork_ids.append(artwork_id)
+    return user_ids, artwork_ids
+
+def build_matrix(user_ids, artwork_ids):
+    """Build a binary users x artworks CSR matrix and the artwork id of each column."""
+    import numpy as np
+    from scipy import sparse
+
+    users = np.frombuffer(user_ids, dtype=np.int32)
+    items = np.frombuffer(artwork_ids, dtype=np.int32)
+    _, user_index = np.unique(users, return_inverse=True)
+    item_ids, item_index = np.unique(items, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(items), dtype=np.float32), (user_index, item_index)),
+        shape=(int(user_index.max()) + 1 if len(users) else 0, len(item_ids))
+    )
+    # The unique constraint on favorites already rules out duplicates,
+    # but clamp anyway so the matrix stays binary
+    matrix.data[:] = 1.0
+    return matrix, item_ids
+
+def top_neighbors(matrix, columns, top_n=DEFAULT_TOP_N, chunk_size=DEFAULT_CHUNK_SIZE,
+                  min_support=DEFAULT_MIN_SUPPORT):
+    """Yield (column, neighbour columns, cosine similarities) for each requested column.
+
+    Co-occurrence is X.T @ X restricted to a chunk of columns at a time and is
+    normalised to cosine similarity by the per-artwork favorite counts.
+    """
+    import numpy as np
+
+    by_item = matrix.T.tocsr()
+    by_column = matrix.tocsc()
+    norms = np.sqrt(np.asarray(by_column.getnnz(axis=0), dtype=np.float32))
+
+    for start in range(0, len(columns), chunk_size):
+        chunk = columns[start:start + chunk_size]
+        cooccurrence = (by_item @ by_column[:, chunk]).tocsc()
+
+        for offset, column in enumerate(chunk):
+            begin, end = cooccurrence.indptr[offset], cooccurrence.indptr[offset + 1]
+            rows = cooccurrence.indices[begin:end]
+            counts = cooccurrence.data[begin:end]
+            keep = (rows != column) & (counts >= min_support)
+            rows, counts = rows[keep], counts[keep]
+            if not len(rows):
+                yield column, rows, counts
+                continue
+
+            scores = counts / (norms[rows] * norms[column])
+            if len(scores) > top_n:
+                best = np.argpartition(-scores, top_n)[:top_n]
+                rows, scores = rows[best], scores[best]
+            order = np.argsort(-scores, kind='stable')
+            yield column, rows[order], scores[order]
+
+def refresh(full=False, top_n=DEFAULT_TOP_N, chunk_size=DEFAULT_CHUNK_SIZE,
+            min_support=DEFAULT_MIN_SUPPORT):
+    """Recompute stored neighbour lists and return how many were written.
+
+    An incremental refresh only recomputes artworks favorited by users who
+    added a favorite since the last run, since those are the only columns
+    whose co-occurrences can have grown. Removed favorites are not tracked,
+    so schedule a periodic full refresh as well.
+    """
+    import numpy as np
+
+    started = datetime.utcnow()
+    since = None if full else db.session.query(func.max(SimilarArtwork.computed_at)).scalar()
+
+    affected = None
+    if since is not None:
+        active_users = db.select(Favorite.user_id).where(Favorite.created_at > since).distinct()
+        affected = db.session.execute(
+            db.select(Favorite.artwork_id).where(Favorite.user_id.in_(active_users)).distinct()
+        ).scalars().all()
+        if not affected:
+            return 0
+
+    matrix, item_ids = build_matrix(*load_favorites())
+
+    if affected is None:
+        columns = np.arange(len(item_ids))
+    else:
+        columns = np.flatnonzero(np.isin(item_ids, np.asarray(affected, dtype=np.int32)))
+
+    written = 0
+    batch = []
+    for column, neighbor_columns, scores in top_neighbors(matrix, columns, top_n, chunk_size, min_support):
+        batch.append({
+            'artwork_id': int(item_ids[column]),
+            'neighbors': json.dumps([
+                [int(item_ids[n]), round(float(s), 4)] for n, s in zip(neighbor_columns, scores)
+            ], separators=(',', ':')),
+            'computed_at': started,
+        })
+        if len(batch) >= chunk_size:
+            written += _store(batch)
+            batch = []
+    if batch:
+        written += _store(batch)
+
+    if since is None:
+        # Artworks that lost all of their favorites keep no stale neighbours
+        db.session.query(SimilarArtwork).filter(
+            SimilarArtwork.computed_at < started
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return written
+
+def _store(batch):
+    db.session.query(SimilarArtwork).filter(
+        SimilarArtwork.artwork_id.in_([row['artwork_id'] for row in batch])
+    ).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(SimilarArtwork, batch)
+    db.session.flush()
+    return len(batch)
+
+def neighbors_for(artwork_id):
+    """Return the stored [(artwork_id, similarity), ...] list for an artwork."""
+    row = SimilarArtwork.query.get(artwork_id)
+    return json.loads(row.neighbors) if row else []
@@ -0,0 +1,30 @@
+from flask import Blueprint, jsonify
+
+# Handle imports in a way that works both at runtime and for linters
+try:
+    from app.models.user import User
+    from app import artists
+except ImportError:
+    # These will be properly imported when the Flask app runs
+    pass
+
+artists_bp = Blueprint('artists', __name__)
+
+@artists_bp.route('/artists/<int:artist_id>', methods=['GET'])
+def get_artist(artist_id):
+    artist = User.query.get(artist_id)
+    
+    # Turning artist status off keeps the artworks, so their totals stay visible
+    if not artist or not (artist.is_artist or artists.has_stats(artist_id)):
+        return jsonify({'error': 'Artist not found'}), 404
+    
+    # Totals are kept up to date by the artwork and favorites routes, so this
+    # is a single row lookup instead of an aggregate over the artist's work
+    return jsonify({
+        'artist': {
+            'id': artist.id,
+            'username': artist.username,
+            'created_at': artist.created_at.isoformat() if artist.created_at else None
+        },
+        'stats': artists.get(artist_id)
+    }), 200
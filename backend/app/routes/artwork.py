@@ -1,49 +1,154 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 import os
 import tempfile
 
 # Handle imports in a way that works both at runtime and for linters
 try:
     from app import db
-    from app.models.artwork import Artwork
-    from app.utils import token_required, artist_required, upload_image_to_cloudinary
+    from app.models.artwork import Artwork, ARTWORK_FIELDS
+    from app.utils import token_required, artist_required, upload_image_to_cloudinary, parse_fields, parse_year
+    from app.events import publish_counts
+    from app import ranking
+    from app.recommendations import neighbors_for
+    from app import facets
+    from app import detail_cache
+    from app import reactions
+    from app import artists
 except ImportError:
     # These will be properly imported when the Flask app runs
     pass
 
 artwork_bp = Blueprint('artwork', __name__)
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
 @artwork_bp.route('/artworks', methods=['GET'])
 def get_artworks():
     # Get query parameters for filtering
     category = request.args.get('category')
     artist_id = request.args.get('artist_id')
+    sort = request.args.get('sort', 'newest')
     
-    # Base query
-    query = Artwork.query
+    if sort != 'newest' and sort not in reactions.RANKED_ORDERS:
+        return jsonify({'error': f'Invalid sort: {sort}'}), 400
     
-    # Apply filters if provided
-    if category:
-        query = query.filter_by(category=category)
-    if artist_id:
-        query = query.filter_by(artist_id=artist_id)
+    try:
+        fields = parse_fields(ARTWORK_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Get artworks
-    artworks = query.order_by(Artwork.created_at.desc()).all()
+    # Ranked sorts are always paginated so they are served straight off the index
+    paginate = 'page' in request.args or 'per_page' in request.args or sort != 'newest'
+    if paginate:
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
     
-    return jsonify({
-        'artworks': [artwork.to_dict() for artwork in artworks],
+    # Load only the columns behind the requested fields
+    options = Artwork.query_options(fields)
+    
+    if sort == 'newest':
+        query = Artwork.query.options(*options)
+        
+        # Apply filters if provided
+        if category:
+            query = query.filter_by(category=category)
+        if artist_id:
+            query = query.filter_by(artist_id=artist_id)
+        
+        query = query.order_by(Artwork.created_at.desc())
+        if paginate:
+            query = query.limit(per_page).offset((page - 1) * per_page)
+        
+        # Get artworks
+        artworks = query.all()
+    else:
+        # Scores live on the interactions database: rank ids there, then fetch the page by id
+        ids = reactions.ranked_ids(
+            sort, category, request.args.get('artist_id', type=int), per_page, (page - 1) * per_page
+        )
+        artworks = reactions.fetch_in_order(ids, options)
+    
+    reactions.attach(artworks, fields)
+    
+    response = {
+        'artworks': [artwork.to_dict(fields) for artwork in artworks],
         'count': len(artworks)
-    }), 200
+    }
+    if paginate:
+        response['page'] = page
+        response['per_page'] = per_page
+    
+    return jsonify(response), 200
+
+@artwork_bp.route('/artworks/facets', methods=['GET'])
+def get_artwork_facets():
+    """Artwork counts per category, medium and year for the gallery filters."""
+    category = request.args.get('category')
+    artist_id = request.args.get('artist_id', type=int)
+    
+    if category and artist_id:
+        return jsonify({'error': 'Filter facets by either category or artist_id, not both'}), 400
+    
+    if artist_id:
+        scope, scope_value = 'artist', str(artist_id)
+    elif category:
+        scope, scope_value = 'category', category
+    else:
+        scope, scope_value = '', ''
+    
+    return jsonify({'facets': facets.counts(scope, scope_value)}), 200
 
 @artwork_bp.route('/artworks/<int:artwork_id>', methods=['GET'])
 def get_artwork(artwork_id):
-    artwork = Artwork.query.get(artwork_id)
+    try:
+        fields = parse_fields(ARTWORK_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Full detail responses are shared between workers, pre-serialized
+    cache = detail_cache.get_cache() if fields is None else None
+    if cache is not None:
+        version = cache.version(artwork_id)
+        blob = cache.get(artwork_id)
+        if blob is not None:
+            return Response(blob, mimetype='application/json'), 200
+    
+    artwork = Artwork.query.options(*Artwork.query_options(fields)).filter_by(id=artwork_id).first()
     
     if not artwork:
         return jsonify({'error': 'Artwork not found'}), 404
     
-    return jsonify({'artwork': artwork.to_dict()}), 200
+    reactions.attach([artwork], fields)
+    response = jsonify({'artwork': artwork.to_dict(fields)})
+    if cache is not None:
+        cache.put(artwork_id, version, response.get_data())
+    
+    return response, 200
+
+@artwork_bp.route('/artworks/<int:artwork_id>/similar', methods=['GET'])
+def get_similar_artworks(artwork_id):
+    """Artworks most often favorited together with this one."""
+    if not Artwork.query.get(artwork_id):
+        return jsonify({'error': 'Artwork not found'}), 404
+    
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    neighbors = neighbors_for(artwork_id)[:limit]
+    
+    # Fetch the neighbours in one query and keep the precomputed order
+    similarity = dict(neighbors)
+    artworks = reactions.attach(reactions.fetch_in_order([neighbor_id for neighbor_id, _ in neighbors]))
+    
+    similar = []
+    for artwork in artworks:
+        artwork_dict = artwork.to_dict()
+        artwork_dict['similarity'] = similarity[artwork.id]
+        similar.append(artwork_dict)
+    
+    return jsonify({
+        'artworks': similar,
+        'count': len(similar)
+    }), 200
 
 @artwork_bp.route('/artworks', methods=['POST', 'OPTIONS'])
 @token_required
@@ -67,6 +172,11 @@ def create_artwork(current_user):
         if not image_file:
             return jsonify({'error': 'Missing required field: image'}), 400
         
+        try:
+            year = parse_year(data.get('year'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Upload image to Cloudinary
         try:
             # Save the file temporarily
@@ -92,6 +202,11 @@ def create_artwork(current_user):
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
+        try:
+            year = parse_year(data.get('year'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         image_url = data['image_url']
     
     # Create new artwork
@@ -104,7 +219,7 @@ def create_artwork(current_user):
             category=data.get('category'),
             medium=data.get('medium'),
             dimensions=data.get('dimensions'),
-            year=data.get('year', None),
+            year=year,
             location=data.get('location')
         )
         
@@ -114,6 +229,9 @@ def create_artwork(current_user):
             pass
         
         db.session.add(new_artwork)
+        facets.apply(facets.snapshot(new_artwork), 1)
+        reactions.create(new_artwork)
+        artists.artwork_added(new_artwork)
         db.session.commit()
         
         return jsonify({
@@ -139,8 +257,16 @@ def update_artwork(current_user, artwork_id):
     
     data = request.get_json()
     
+    if 'year' in data:
+        try:
+            year = parse_year(data['year'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
     # Update artwork fields
     try:
+        before = facets.snapshot(artwork)
+        
         if 'title' in data:
             artwork.title = data['title']
         if 'description' in data:
@@ -154,11 +280,16 @@ def update_artwork(current_user, artwork_id):
         if 'dimensions' in data:
             artwork.dimensions = data['dimensions']
         if 'year' in data:
-            artwork.year = data['year']
+            artwork.year = year
         if 'location' in data:
             artwork.location = data['location']
         
+        after = facets.snapshot(artwork)
+        facets.move(before, after)
+        if before['category'] != after['category']:
+            reactions.set_category(artwork.id, artwork.category)
         db.session.commit()
+        detail_cache.invalidate(artwork_id)
         
         return jsonify({
             'message': 'Artwork updated successfully',
@@ -182,8 +313,12 @@ def delete_artwork(current_user, artwork_id):
         return jsonify({'error': 'You can only delete your own artworks'}), 403
     
     try:
+        facets.apply(facets.snapshot(artwork), -1)
+        artists.artwork_removed(artwork)
+        reactions.remove([artwork.id])
         db.session.delete(artwork)
         db.session.commit()
+        detail_cache.invalidate(artwork_id)
         
         return jsonify({
             'message': 'Artwork deleted successfully'
@@ -202,8 +337,12 @@ def like_artwork(current_user, artwork_id):
         return jsonify({'error': 'Artwork not found'}), 404
     
     try:
-        artwork.likes += 1
+        reactions.increment(artwork, likes=1)
+        artists.adjust(artwork.artist_id, likes=1)
+        ranking.record_event(artwork.id, 'like')
         db.session.commit()
+        detail_cache.invalidate(artwork_id)
+        publish_counts(artwork)
         
         return jsonify({
             'message': 'Artwork liked successfully',
@@ -223,8 +362,12 @@ def dislike_artwork(current_user, artwork_id):
         return jsonify({'error': 'Artwork not found'}), 404
     
     try:
-        artwork.dislikes += 1
+        reactions.increment(artwork, dislikes=1)
+        artists.adjust(artwork.artist_id, dislikes=1)
+        ranking.record_event(artwork.id, 'dislike')
         db.session.commit()
+        detail_cache.invalidate(artwork_id)
+        publish_counts(artwork)
         
         return jsonify({
             'message': 'Artwork disliked successfully',
@@ -8,6 +8,7 @@ try:
     from app import db
     from app.models.user import User
     from app.utils import token_required
+    from app.accounts import delete_account
 except ImportError:
     # These will be properly imported when the Flask app runs
     pass
@@ -110,6 +111,22 @@ def get_user():
     except jwt.InvalidTokenError:
         return jsonify({'error': 'Invalid token'}), 401
 
+@auth_bp.route('/user', methods=['DELETE'])
+@token_required
+def delete_user(current_user):
+    """Delete the authenticated user with all of their artworks and favorites"""
+    try:
+        deleted_artworks = delete_account(current_user.id)
+        
+        return jsonify({
+            'message': 'Account deleted successfully',
+            'deleted_artworks': deleted_artworks
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @auth_bp.route('/update-artist-status', methods=['PUT', 'OPTIONS'])
 @token_required
 def update_artist_status(current_user):
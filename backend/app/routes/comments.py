@@ -0,0 +1,94 @@
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy.exc import IntegrityError
+
+# Handle imports in a way that works both at runtime and for linters
+try:
+    from app.models.artwork import Artwork
+    from app.utils import token_required
+    from app import comments
+except ImportError:
+    # These will be properly imported when the Flask app runs
+    pass
+
+comments_bp = Blueprint('comments', __name__)
+
+@comments_bp.route('/artworks/<int:artwork_id>/comments', methods=['GET'])
+def get_comments(artwork_id):
+    order = request.args.get('order', 'newest')
+    if order not in comments.ORDERS:
+        return jsonify({'error': f"Invalid order: {order}. Use one of: {', '.join(comments.ORDERS)}"}), 400
+
+    limit = request.args.get('limit', comments.DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, comments.MAX_PAGE_SIZE))
+
+    if not Artwork.query.filter_by(id=artwork_id).count():
+        return jsonify({'error': 'Artwork not found'}), 404
+
+    try:
+        page, next_cursor = comments.page(artwork_id, order, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'comments': page,
+        'count': len(page),
+        'order': order,
+        'next_cursor': next_cursor
+    }), 200
+
+@comments_bp.route('/artworks/<int:artwork_id>/comments', methods=['POST'])
+@token_required
+def add_comment(current_user, artwork_id):
+    artwork = Artwork.query.get(artwork_id)
+
+    if not artwork:
+        return jsonify({'error': 'Artwork not found'}), 404
+
+    data = request.get_json(silent=True) or {}
+    content = data.get('content')
+    if not isinstance(content, str) or not content.strip():
+        return jsonify({'error': 'Comment content is required'}), 400
+    content = content.strip()
+    if len(content) > comments.MAX_CONTENT_LENGTH:
+        return jsonify({'error': f'Comment must be at most {comments.MAX_CONTENT_LENGTH} characters'}), 400
+
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= comments.MAX_IDEMPOTENCY_KEY_LENGTH:
+        return jsonify({'error': f'Idempotency-Key must be 1 to {comments.MAX_IDEMPOTENCY_KEY_LENGTH} characters'}), 400
+
+    # A retried post answers with the comment the first attempt stored
+    existing = comments.find(current_user.id, idempotency_key) if idempotency_key else None
+    if existing:
+        return posted(existing, current_user, 200)
+
+    try:
+        comment = current_app.extensions['comment_writer'].post(artwork, current_user.id, content, idempotency_key)
+    except comments.Backlogged:
+        # Nothing was queued, so retrying cannot post the comment twice
+        response = jsonify({'error': 'Too many comments are being posted, please retry'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    except comments.CommitPending:
+        # Not retryable: the comment may still be committed
+        return jsonify({
+            'message': 'Comment accepted and still being saved; resend it with the same Idempotency-Key to get it',
+            'pending': True
+        }), 202
+    except IntegrityError as e:
+        # The same key was posted concurrently and the other request won
+        existing = comments.find(current_user.id, idempotency_key) if idempotency_key else None
+        if existing:
+            return posted(existing, current_user, 200)
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return posted(comment, current_user, 201)
+
+def posted(comment, current_user, status):
+    comment['username'] = current_user.username
+    return jsonify({
+        'message': 'Comment added successfully',
+        'comment': comment
+    }), status
@@ -0,0 +1,37 @@
+from flask import Blueprint, Response, request, jsonify
+
+# Handle imports in a way that works both at runtime and for linters
+try:
+    from app.models.artwork import Artwork
+    from app.events import broker, stream
+except ImportError:
+    # These will be properly imported when the Flask app runs
+    pass
+
+events_bp = Blueprint('events', __name__)
+
+def event_stream_response(subscription):
+    return Response(
+        stream(subscription),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop nginx from buffering the stream
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@events_bp.route('/artworks/<int:artwork_id>/events', methods=['GET'])
+def artwork_events(artwork_id):
+    """Stream live like/dislike/favorite counts for one artwork."""
+    if not Artwork.query.get(artwork_id):
+        return jsonify({'error': 'Artwork not found'}), 404
+
+    return event_stream_response(broker.subscribe(artwork_id=artwork_id))
+
+@events_bp.route('/artworks/events', methods=['GET'])
+def category_events():
+    """Stream live counts for every artwork, optionally limited to a category."""
+    category = request.args.get('category')
+
+    return event_stream_response(broker.subscribe(category=category))
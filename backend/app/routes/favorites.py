@@ -5,25 +5,49 @@ from sqlalchemy.exc import IntegrityError
 try:
     from app import db
     from app.models.favorite import Favorite
-    from app.models.artwork import Artwork
-    from app.utils import token_required
+    from app.models.artwork import Artwork, ARTWORK_FIELDS
+    from app.utils import token_required, parse_fields
+    from app.events import broker
+    from app import ranking
+    from app import reactions
+    from app import artists
 except ImportError:
     # These will be properly imported when the Flask app runs
     pass
 
 favorites_bp = Blueprint('favorites', __name__)
 
+def publish_favorite_count(artwork):
+    broker.publish(
+        artwork.id,
+        artwork.category,
+        favorites=Favorite.query.filter_by(artwork_id=artwork.id).count()
+    )
+
 @favorites_bp.route('/favorites', methods=['GET'])
 @token_required
 def get_user_favorites(current_user):
-    favorites = Favorite.query.filter_by(user_id=current_user.id).all()
+    try:
+        fields = parse_fields(ARTWORK_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # In the order they were added, whichever index the interactions database reads
+    favorites = Favorite.query.filter_by(user_id=current_user.id).order_by(Favorite.id).all()
+    
+    # Favorites live on the interactions database, so look the artworks up by id in one query
+    artworks = {
+        artwork.id: artwork
+        for artwork in reactions.attach(reactions.fetch_in_order(
+            [favorite.artwork_id for favorite in favorites], Artwork.query_options(fields)
+        ), fields)
+    }
     
-    # Get the artwork details for each favorite
     favorite_artworks = []
     for favorite in favorites:
-        artwork = Artwork.query.get(favorite.artwork_id)
+        artwork = artworks.get(favorite.artwork_id)
         if artwork:
-            artwork_dict = artwork.to_dict()
+            artwork_dict = artwork.to_dict(fields)
             artwork_dict['favorite_id'] = favorite.id
             favorite_artworks.append(artwork_dict)
     
@@ -57,7 +81,10 @@ def add_favorite(current_user, artwork_id):
         )
         
         db.session.add(new_favorite)
+        ranking.record_event(artwork_id, 'favorite')
+        artists.adjust(artwork.artist_id, favorites=1)
         db.session.commit()
+        publish_favorite_count(artwork)
         
         return jsonify({
             'message': 'Artwork added to favorites',
@@ -83,10 +110,21 @@ def remove_favorite(current_user, artwork_id):
     if not favorite:
         return jsonify({'error': 'Artwork not in favorites'}), 404
     
+    artwork = Artwork.query.get(artwork_id)
+    
     # Delete favorite
     try:
+        # Take back exactly what the favorite added, which has decayed since
+        # it was created; weighting it at the current time would overshoot
+        favorited_at = ranking.favorite_time(favorite.created_at)
         db.session.delete(favorite)
+        ranking.record_event(artwork_id, 'unfavorite', now=favorited_at)
+        if artwork:
+            artists.adjust(artwork.artist_id, favorites=-1)
         db.session.commit()
+
+        if artwork:
+            publish_favorite_count(artwork)
         
         return jsonify({
             'message': 'Artwork removed from favorites'
@@ -0,0 +1,276 @@
+import os
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock; concurrent boots then rely on the retries below
+    fcntl = None
+
+# Bump whenever a model gains a table, index or column so existing databases
+# pick it up on the next boot. create_all only adds missing tables; indexes
+# missing from existing tables are added by name, and columns added to
+# existing tables are listed in ADDED_COLUMNS as well.
+SCHEMA_VERSION = 9
+
+STAMP_TABLE = 'schema_version'
+
+# (bind, table, column, DDL type and default) added after the table first shipped
+ADDED_COLUMNS = [
+    ('interactions', 'artwork_reactions', 'comment_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('interactions', 'artwork_reactions', 'artist_id', 'INTEGER'),
+    ('interactions', 'comments', 'idempotency_key', 'VARCHAR(64)'),
+]
+
+# Added columns copied from the catalog, filled in by reactions.sync()
+SYNCED_COLUMNS = {('artwork_reactions', 'artist_id')}
+
+# Rows copied per INSERT when interactions tables move off the catalog
+MOVE_BATCH_SIZE = 500
+
+# Columns that once lived on artworks and moved to ArtworkReaction. They are
+# copied over by reactions.sync() before the table is rebuilt without them.
+LEGACY_COUNTER_COLUMNS = {'likes', 'dislikes'}
+
+def _stamped_version(connection, name):
+    try:
+        return connection.execute(
+            text(f'SELECT version FROM {STAMP_TABLE} WHERE bind = :bind'), {'bind': name}
+        ).scalar()
+    except (OperationalError, ProgrammingError):
+        # The stamp table does not exist yet
+        return None
+
+def _stamp(connection, name):
+    connection.execute(text(
+        f'CREATE TABLE IF NOT EXISTS {STAMP_TABLE} (bind VARCHAR(50) PRIMARY KEY, version INTEGER NOT NULL)'
+    ))
+    connection.execute(text(f'DELETE FROM {STAMP_TABLE} WHERE bind = :bind'), {'bind': name})
+    connection.execute(
+        text(f'INSERT INTO {STAMP_TABLE} (bind, version) VALUES (:bind, :version)'),
+        {'bind': name, 'version': SCHEMA_VERSION}
+    )
+
+def _add_columns(engine, bind_key):
+    """Add the ADDED_COLUMNS this bind's tables lack; return them as (table, column)."""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    added = []
+    for bind, table, column, ddl in ADDED_COLUMNS:
+        if bind != bind_key or table not in tables:
+            continue
+        if column in {c['name'] for c in inspector.get_columns(table)}:
+            continue
+        try:
+            with engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+            added.append((table, column))
+        except OperationalError:
+            # Another worker booting at the same time added it first
+            pass
+    return added
+
+def _add_indexes(db, bind_key):
+    """Create model indexes missing from tables that already existed."""
+    engine = db.engines[bind_key]
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    with engine.begin() as connection:
+        for table in db.metadatas[bind_key].sorted_tables:
+            if table.name in tables:
+                for index in table.indexes:
+                    index.create(connection, checkfirst=True)
+
+@contextmanager
+def _schema_lock():
+    """Serialize schema changes between workers booting at the same time."""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(current_app.instance_path, exist_ok=True)
+    with open(os.path.join(current_app.instance_path, 'schema.lock'), 'w') as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+def _foreign_keys(table, inspector):
+    """(columns, referred table, ON DELETE) of the model's and the database's foreign keys."""
+    declared = {
+        (tuple(fk.parent.name for fk in constraint.elements), constraint.referred_table.name,
+         (constraint.ondelete or '').upper())
+        for constraint in table.foreign_key_constraints
+    }
+    existing = {
+        (tuple(fk['constrained_columns']), fk['referred_table'],
+         (fk.get('options', {}).get('ondelete') or '').upper())
+        for fk in inspector.get_foreign_keys(table.name)
+    }
+    return declared, existing
+
+def _is_stale(table, inspector):
+    """Whether a table still has dropped columns or outdated foreign keys.
+
+    With foreign keys enforced, a constraint created before ON DELETE CASCADE
+    was declared makes deleting the parent row fail.
+    """
+    columns = {c['name'] for c in inspector.get_columns(table.name)}
+    if columns - set(table.columns.keys()):
+        return True
+    declared, existing = _foreign_keys(table, inspector)
+    return declared != existing
+
+def _rebuild(engine, table):
+    """Recreate a table from its model, keeping the rows of the columns it still has.
+
+    SQLite cannot drop constrained or indexed columns, nor change constraints,
+    so this follows its documented procedure: rename, create, copy, drop.
+    """
+    columns = {c['name'] for c in inspect(engine).get_columns(table.name)}
+    keep = ', '.join(c.name for c in table.columns if c.name in columns)
+    legacy = f'{table.name}_legacy'
+    with engine.connect() as connection:
+        connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        # Keep other tables' references pointing at the name, not the renamed table
+        connection.exec_driver_sql('PRAGMA legacy_alter_table=ON')
+        try:
+            connection.exec_driver_sql('BEGIN')
+            connection.exec_driver_sql(f'ALTER TABLE {table.name} RENAME TO {legacy}')
+            for index in inspect(connection).get_indexes(legacy):
+                connection.exec_driver_sql(f'DROP INDEX {index["name"]}')
+            table.create(connection)
+            connection.exec_driver_sql(f'INSERT INTO {table.name} ({keep}) SELECT {keep} FROM {legacy}')
+            connection.exec_driver_sql(f'DROP TABLE {legacy}')
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.exec_driver_sql('PRAGMA legacy_alter_table=OFF')
+            connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+
+def _copy_rows(source, target, table):
+    """Copy a table's rows between databases, skipping rows the target already has."""
+    source_columns = {c['name'] for c in inspect(source).get_columns(table.name)}
+    columns = [c for c in table.columns if c.name in source_columns]
+    primary_key = [c.name for c in table.primary_key.columns]
+    with target.connect() as connection:
+        present = {tuple(row) for row in connection.execute(select(*table.primary_key.columns))}
+
+    insert = table.insert()
+    if target.dialect.name == 'sqlite':
+        # Also skips rows that would break a unique constraint, e.g. a user's
+        # favorite of an artwork that already exists under another id
+        insert = insert.prefix_with('OR IGNORE')
+    with source.connect() as reader, target.begin() as writer:
+        rows = reader.execute(select(*columns)).mappings()
+        while True:
+            batch = [dict(row) for row in rows.fetchmany(MOVE_BATCH_SIZE)]
+            if not batch:
+                break
+            batch = [row for row in batch if tuple(row[name] for name in primary_key) not in present]
+            if batch:
+                writer.execute(insert, batch)
+
+def _move_to_interactions(db):
+    """Move interactions tables off the catalog once the binds are split.
+
+    Favorites started out on the catalog database, and a database run with
+    the binds shared has every interactions table there. Left behind, their
+    rows would go missing and their old foreign keys would block deletes.
+    Rows are copied before the catalog's table is dropped, and copying skips
+    rows already present, so an interrupted move finishes on the next boot.
+    Returns the names of the moved tables.
+    """
+    catalog, interactions = db.engines[None], db.engines['interactions']
+    if catalog is interactions:
+        return []
+
+    existing = set(inspect(catalog).get_table_names())
+    moved = [table for table in db.metadatas['interactions'].sorted_tables if table.name in existing]
+    for table in moved:
+        _copy_rows(catalog, interactions, table)
+    with catalog.begin() as connection:
+        for table in reversed(moved):
+            connection.execute(text(f'DROP TABLE {table.name}'))
+        if moved and STAMP_TABLE in existing:
+            # Switching back to a shared database must recreate the tables
+            connection.execute(text(f'DELETE FROM {STAMP_TABLE} WHERE bind = :bind'), {'bind': 'interactions'})
+    return [table.name for table in moved]
+
+def _rebuild_stale_tables(db, bind_key):
+    engine = db.engines[bind_key]
+    if engine.dialect.name != 'sqlite':
+        # Other databases can ALTER in place and are migrated by hand
+        return []
+
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    rebuilt = []
+    for table in db.metadatas[bind_key].sorted_tables:
+        if table.name not in existing or not _is_stale(table, inspector):
+            continue
+        if table.name == 'artworks':
+            columns = {c['name'] for c in inspector.get_columns('artworks')}
+            if LEGACY_COUNTER_COLUMNS <= columns:
+                from app import reactions
+                reactions.sync()
+        _rebuild(engine, table)
+        rebuilt.append(table.name)
+    return rebuilt
+
+def ensure_schema(db, force=False):
+    """Create missing tables only when a bind's stamp is out of date.
+
+    db.create_all() inspects every table on every call. Checking one stamp
+    row per bind instead keeps worker boot down to a single cheap query.
+    Stamps are keyed by bind because binds may share one database.
+    Tables left with columns or foreign keys an older release created are
+    rebuilt, and interactions tables left on the catalog are moved to a
+    separate interactions database, so databases from any earlier version
+    keep working.
+    Returns the bind keys whose tables were (re)created.
+    """
+    with _schema_lock():
+        created = []
+        added = []
+        for bind_key, engine in db.engines.items():
+            name = bind_key or 'default'
+            with engine.connect() as connection:
+                if not force and _stamped_version(connection, name) == SCHEMA_VERSION:
+                    continue
+
+            try:
+                db.create_all(bind_key=bind_key)
+            except OperationalError:
+                # Another worker booting at the same time created a table between
+                # our existence check and CREATE TABLE; the second pass skips it
+                db.create_all(bind_key=bind_key)
+            added += _add_columns(engine, bind_key)
+            _add_indexes(db, bind_key)
+            created.append(bind_key)
+
+        # Moving tables, rebuilding artworks and filling synced columns copy
+        # data between binds, so they wait until every bind has its tables.
+        # Counters move before artworks' legacy ones are copied, so they win.
+        moved = _move_to_interactions(db) if 'interactions' in created else []
+        if 'interactions' in created:
+            # After the move, so a moved epoch is kept
+            from app import ranking
+            with db.engines['interactions'].begin() as connection:
+                ranking.create_state(connection)
+        for bind_key in created:
+            _rebuild_stale_tables(db, bind_key)
+        # Moved reaction rows may predate the copied category and artist
+        if moved or SYNCED_COLUMNS & set(added):
+            from app import reactions
+            reactions.sync()
+        for bind_key in created:
+            with db.engines[bind_key].begin() as connection:
+                _stamp(connection, bind_key or 'default')
+        return created
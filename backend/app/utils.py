@@ -2,8 +2,6 @@ from flask import request, jsonify
 from functools import wraps
 import jwt
 import os
-import cloudinary
-import cloudinary.uploader
 
 # For avoiding circular imports
 user_module = None
@@ -12,19 +10,31 @@ def set_user_module(module):
     global user_module
     user_module = module
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME', 'demo'),
-    api_key=os.getenv('CLOUDINARY_API_KEY', ''),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET', ''),
-    secure=True
-)
+# Cloudinary pulls in a large dependency tree, so it is only imported and
+# configured on the first upload rather than at worker boot
+_cloudinary_uploader = None
+
+def get_cloudinary_uploader():
+    global _cloudinary_uploader
+    if _cloudinary_uploader is None:
+        import cloudinary
+        import cloudinary.uploader
+        
+        # Configure Cloudinary
+        cloudinary.config(
+            cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME', 'demo'),
+            api_key=os.getenv('CLOUDINARY_API_KEY', ''),
+            api_secret=os.getenv('CLOUDINARY_API_SECRET', ''),
+            secure=True
+        )
+        _cloudinary_uploader = cloudinary.uploader
+    return _cloudinary_uploader
 
 def upload_image_to_cloudinary(image_file, folder="artwork"):
     """Upload an image to Cloudinary and return the URL."""
     try:
         # Upload the image
-        result = cloudinary.uploader.upload(
+        result = get_cloudinary_uploader().upload(
             image_file,
             folder=folder,
             resource_type="image"
@@ -36,6 +46,38 @@ def upload_image_to_cloudinary(image_file, folder="artwork"):
         # Return a fallback URL in case of error
         return f"https://images.unsplash.com/photo-{1550000000000}?ixlib=rb-4.0.3"
 
+def parse_fields(allowed):
+    """Read the comma-separated fields= query parameter.
+    
+    Returns None when the parameter is absent so callers fall back to every
+    field, and raises ValueError for names not in allowed.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def parse_year(value):
+    """Read an artwork year from JSON or form data.
+    
+    Accepts whole numbers and numeric strings, returns None when the year is
+    left empty and raises ValueError for anything else.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError('Year must be a whole number')
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        return int(value.strip())
+    raise ValueError('Year must be a whole number')
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
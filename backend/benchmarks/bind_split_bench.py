@@ -0,0 +1,136 @@
+"""Write throughput with one SQLite file versus a separate interactions database.
+
+Reaction writers (likes) and catalog writers (artwork edits) run in separate
+processes, as they would in prefork workers. With a single file every like
+holds the catalog's write lock; with INTERACTIONS_DATABASE_URI pointing at a
+second file the two streams of writes proceed independently.
+
+    python benchmarks/bind_split_bench.py --reaction-writers 4 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ARTWORKS = 200
+
+
+def make_app(env):
+    os.environ.update(env)
+    sys.path.insert(0, BACKEND)
+    from app import create_app
+    return create_app()
+
+
+def seed(env):
+    app = make_app(env)
+    from app import db
+    from app.models.artwork import Artwork
+    from app.models.reaction import ArtworkReaction
+    from app.models.user import User
+
+    with app.app_context():
+        artist = User(username='bench', email='bench@example.com', is_artist=True)
+        artist.set_password('bench')
+        db.session.add(artist)
+        db.session.commit()
+        db.session.execute(Artwork.__table__.insert(), [{
+            'id': i, 'title': f'Artwork {i}', 'image_url': 'https://example.com/a.jpg', 'artist_id': artist.id,
+        } for i in range(1, ARTWORKS + 1)])
+        db.session.execute(ArtworkReaction.__table__.insert(), [{
+            'artwork_id': i, 'likes': 0, 'dislikes': 0, 'popularity_score': 0.0,
+        } for i in range(1, ARTWORKS + 1)])
+        db.session.commit()
+
+
+def reaction_writer(env, seconds, results):
+    app = make_app(env)
+    from app import db, ranking, reactions
+    from app.models.artwork import Artwork
+
+    done = 0
+    with app.app_context():
+        artworks = Artwork.query.all()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            artwork = random.choice(artworks)
+            reactions.increment(artwork, likes=1)
+            ranking.record_event(artwork.id, 'like')
+            db.session.commit()
+            done += 1
+    results.put(('reaction', done, []))
+
+
+def catalog_writer(env, seconds, results):
+    app = make_app(env)
+    from app import db
+    from app.models.artwork import Artwork
+
+    done = 0
+    latencies = []
+    with app.app_context():
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            Artwork.query.filter_by(id=random.randint(1, ARTWORKS)).update({Artwork.title: f'Edit {done}'})
+            db.session.commit()
+            latencies.append(time.perf_counter() - started)
+            done += 1
+    results.put(('catalog', done, latencies))
+
+
+def run(env, args):
+    ctx = multiprocessing.get_context('spawn')
+    seeder = ctx.Process(target=seed, args=(env,))
+    seeder.start()
+    seeder.join()
+
+    results = ctx.Queue()
+    procs = [ctx.Process(target=reaction_writer, args=(env, args.seconds, results))
+             for _ in range(args.reaction_writers)]
+    procs += [ctx.Process(target=catalog_writer, args=(env, args.seconds, results))
+              for _ in range(args.catalog_writers)]
+    for proc in procs:
+        proc.start()
+
+    totals = {'reaction': 0, 'catalog': 0}
+    latencies = []
+    for _ in procs:
+        kind, done, samples = results.get()
+        totals[kind] += done
+        latencies.extend(samples)
+    for proc in procs:
+        proc.join()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+    return (totals['reaction'] / args.seconds, totals['catalog'] / args.seconds,
+            statistics.median(latencies) if latencies else 0.0, p99)
+
+
+def main(args):
+    for label, split in (('single file', False), ('split binds', True)):
+        workdir = tempfile.mkdtemp()
+        env = {
+            'DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'catalog.db')}",
+            'DETAIL_CACHE_PATH': os.path.join(workdir, 'detail-cache'),
+        }
+        env['INTERACTIONS_DATABASE_URI'] = (
+            f"sqlite:///{os.path.join(workdir, 'interactions.db')}" if split else env['DATABASE_URI']
+        )
+        reactions, catalog, median, p99 = run(env, args)
+        print(f'{label:<12} reactions {reactions:8.0f}/s  catalog edits {catalog:7.0f}/s  '
+              f'edit latency p50={median * 1000:.1f}ms p99={p99 * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reaction-writers', type=int, default=4)
+    parser.add_argument('--catalog-writers', type=int, default=1)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+"""Comment posting throughput with and without group commit.
+
+Many threads post comments through the worker's CommentWriter against a
+SQLite file, once with max_batch=1 (one transaction per comment, as a plain
+INSERT + COMMIT in the handler would do) and once with the default grouping.
+Reports posts per second, post latency and the average group size.
+
+    python benchmarks/comment_bench.py --threads 64 --seconds 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+ARTWORKS = 50
+
+
+def make_app(workdir):
+    os.environ['DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'catalog.db')}"
+    os.environ['INTERACTIONS_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'interactions.db')}"
+    os.environ['DETAIL_CACHE_PATH'] = os.path.join(workdir, 'detail-cache')
+    from app import create_app
+    return create_app()
+
+
+def seed(app):
+    from app import db, reactions
+    from app.models.artwork import Artwork
+    from app.models.user import User
+
+    with app.app_context():
+        artist = User(username='bench', email='bench@example.com', is_artist=True)
+        artist.set_password('bench')
+        db.session.add(artist)
+        db.session.commit()
+        artworks = [Artwork(title=f'Artwork {i}', image_url='https://example.com/a.jpg', artist_id=artist.id)
+                    for i in range(ARTWORKS)]
+        db.session.add_all(artworks)
+        db.session.flush()
+        for artwork in artworks:
+            reactions.create(artwork)
+        db.session.commit()
+        # The writer only needs the id, category and artist of an artwork
+        return artist.id, [SimpleNamespace(id=a.id, category=a.category, artist_id=a.artist_id) for a in artworks]
+
+
+def run(writer, user_id, artworks, args):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def poster():
+        samples = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            writer.post(random.choice(artworks), user_id, 'Lovely brushwork')
+            samples.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(samples)
+
+    threads = [threading.Thread(target=poster) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return len(latencies) / args.seconds, statistics.median(latencies), p99
+
+
+def main(args):
+    app = make_app(tempfile.mkdtemp())
+    from app.comments import CommentWriter
+
+    user_id, artworks = seed(app)
+    for label, max_batch in (('per comment', 1), ('grouped', args.max_batch)):
+        writer = CommentWriter(app, max_batch=max_batch)
+        posts, median, p99 = run(writer, user_id, artworks, args)
+        print(f'{label:<12} {posts:8.0f} posts/s  p50={median * 1000:.1f}ms p99={p99 * 1000:.1f}ms  '
+              f'avg group {writer.committed / max(writer.batches, 1):.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--max-batch', type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,115 @@
+"""Multi-process throughput of GET /api/artworks/<id> with and without the shared detail cache.
+
+Several worker processes hammer a small set of hot artworks, as prefork
+workers do during a featured drop, while one process keeps liking them so
+the cache is continuously invalidated.
+
+    python benchmarks/detail_cache_bench.py --workers 8 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def make_app(env):
+    os.environ.update(env)
+    sys.path.insert(0, BACKEND)
+    from app import create_app
+    return create_app()
+
+
+def seed(env, hot):
+    app = make_app(env)
+    from app import db
+    from app.models.artwork import Artwork
+    from app.models.reaction import ArtworkReaction
+    from app.models.user import User
+
+    with app.app_context():
+        artist = User(username='bench', email='bench@example.com', is_artist=True)
+        artist.set_password('bench')
+        db.session.add(artist)
+        db.session.commit()
+        db.session.execute(Artwork.__table__.insert(), [{
+            'title': f'Artwork {i}',
+            'description': 'A long description. ' * 50,
+            'image_url': 'https://example.com/a.jpg',
+            'artist_id': artist.id,
+        } for i in range(hot)])
+        db.session.execute(ArtworkReaction.__table__.insert(), [{
+            'artwork_id': i + 1, 'likes': 0, 'dislikes': 0, 'popularity_score': 0.0
+        } for i in range(hot)])
+        db.session.commit()
+
+
+def reader(env, hot, seconds, results):
+    client = make_app(env).test_client()
+    deadline = time.perf_counter() + seconds
+    served = 0
+    while time.perf_counter() < deadline:
+        assert client.get(f'/api/artworks/{random.randint(1, hot)}').status_code == 200
+        served += 1
+    results.put(served)
+
+
+def writer(env, hot, seconds, interval):
+    app = make_app(env)
+    from app import db
+    from app import detail_cache
+    from app.models.reaction import ArtworkReaction
+
+    deadline = time.perf_counter() + seconds
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            artwork_id = random.randint(1, hot)
+            ArtworkReaction.query.filter_by(artwork_id=artwork_id).update(
+                {ArtworkReaction.likes: ArtworkReaction.likes + 1}
+            )
+            db.session.commit()
+            detail_cache.invalidate(artwork_id)
+            time.sleep(interval)
+
+
+def run(env, args):
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    procs = [ctx.Process(target=reader, args=(env, args.hot, args.seconds, results))
+             for _ in range(args.workers)]
+    procs.append(ctx.Process(target=writer, args=(env, args.hot, args.seconds, args.write_interval)))
+    for proc in procs:
+        proc.start()
+    served = sum(results.get() for _ in range(args.workers))
+    for proc in procs:
+        proc.join()
+    return served / args.seconds
+
+
+def main(args):
+    workdir = tempfile.mkdtemp()
+    base = {
+        'DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'DETAIL_CACHE_PATH': os.path.join(workdir, 'detail-cache'),
+    }
+    ctx = multiprocessing.get_context('spawn')
+    proc = ctx.Process(target=seed, args=(base, args.hot))
+    proc.start()
+    proc.join()
+
+    for label, slots in (('no cache', '0'), ('shared cache', '4096')):
+        rate = run(dict(base, DETAIL_CACHE_SLOTS=slots), args)
+        print(f'{label:<13} {rate:10.0f} req/s across {args.workers} workers')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--hot', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--write-interval', type=float, default=0.01)
+    main(parser.parse_args())
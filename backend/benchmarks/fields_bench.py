@@ -0,0 +1,69 @@
+"""Per-request memory and payload size of artwork listings with and without fields=.
+
+Artworks are seeded with long descriptions, the column a list view never
+shows, so the difference between full entities and a sparse fieldset is
+visible in both the traced allocation peak and the response size.
+
+    python benchmarks/fields_bench.py --artworks 5000 --description-size 4000
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+LIST_FIELDS = 'id,title,image_url,artist_name,likes,dislikes'
+
+
+def measure(client, url):
+    tracemalloc.start()
+    response = client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert response.status_code == 200, response.data
+    return peak, len(response.data)
+
+
+def main(args):
+    os.environ['DATABASE_URI'] = 'sqlite://'
+    from app import create_app, db
+    from app.models.artwork import Artwork
+    from app.models.user import User
+
+    app = create_app()
+    with app.app_context():
+        artist = User(username='bench', email='bench@example.com', is_artist=True)
+        artist.set_password('bench')
+        db.session.add(artist)
+        db.session.commit()
+        db.session.execute(Artwork.__table__.insert(), [{
+            'title': f'Artwork {i}',
+            'description': 'x' * args.description_size,
+            'image_url': 'https://example.com/a.jpg',
+            'artist_id': artist.id,
+            'category': 'Abstract',
+        } for i in range(args.artworks)])
+        db.session.commit()
+
+    client = app.test_client()
+    per_page = f'page=1&per_page={args.per_page}'
+    cases = [
+        ('list, all fields', f'/api/artworks?{per_page}'),
+        ('list, fields=', f'/api/artworks?{per_page}&fields={LIST_FIELDS}'),
+        ('detail, all fields', '/api/artworks/1'),
+        ('detail, fields=', f'/api/artworks/1?fields={LIST_FIELDS}'),
+    ]
+    for label, url in cases:
+        # Warm up once so one-off import and compile costs are not counted
+        client.get(url)
+        peak, size = measure(client, url)
+        print(f'{label:<20} peak {peak / 1024:9.1f} KiB  payload {size / 1024:9.1f} KiB')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artworks', type=int, default=2000)
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--description-size', type=int, default=2000)
+    main(parser.parse_args())
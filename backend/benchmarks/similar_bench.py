@@ -0,0 +1,51 @@
+"""Time the "also favorited" batch job on a synthetic favorites matrix.
+
+Favorites are drawn with a long-tailed artwork popularity so a few hot
+artworks co-occur with almost everything, which is the worst case for the
+chunked co-occurrence product.
+
+    python benchmarks/similar_bench.py --favorites 5000000 --users 500000 --artworks 200000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from array import array
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.recommendations import build_matrix, top_neighbors  # noqa: E402
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    users = rng.integers(0, args.users, args.favorites, dtype=np.int32)
+    artworks = (rng.zipf(1.3, args.favorites) % args.artworks).astype(np.int32)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    matrix, item_ids = build_matrix(array('i', users.tobytes()), array('i', artworks.tobytes()))
+    built = time.perf_counter()
+
+    stored = 0
+    for _, neighbors, _ in top_neighbors(matrix, np.arange(len(item_ids)), args.top_n, args.chunk_size):
+        stored += len(neighbors)
+    finished = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+
+    print(f'matrix {matrix.shape[0]}x{matrix.shape[1]} nnz={matrix.nnz} built in {built - started:.1f}s')
+    print(f'neighbours for {len(item_ids)} artworks ({stored} pairs) in {finished - built:.1f}s')
+    print(f'peak traced memory {peak / 2**20:.0f} MiB')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--favorites', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--artworks', type=int, default=50000)
+    parser.add_argument('--top-n', type=int, default=20)
+    parser.add_argument('--chunk-size', type=int, default=256)
+    main(parser.parse_args())
@@ -0,0 +1,91 @@
+"""Local load test for the artwork SSE endpoint.
+
+Opens many idle event-stream connections against a running server, then likes
+the artwork a few times and reports how long it took for every subscriber to
+receive the coalesced update.
+
+    gunicorn -k gevent -w 4 --worker-connections 10000 'app:create_app()'
+    python benchmarks/sse_load.py --token <jwt> --artwork 1 --connections 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+
+async def open_stream(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    # Skip the response headers and the initial retry frame
+    await reader.readuntil(b"\r\n\r\n")
+    await reader.readuntil(b"\n\n")
+    return reader, writer
+
+
+async def next_event(reader):
+    while True:
+        frame = await reader.readuntil(b"\n\n")
+        if b"event: counts" in frame:
+            return time.perf_counter()
+
+
+def like(base_url, artwork_id, token):
+    req = urllib.request.Request(
+        f"{base_url}/api/artworks/{artwork_id}/like",
+        data=b"{}",
+        method="POST",
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+    )
+    urllib.request.urlopen(req).read()
+
+
+async def main(args):
+    url = urlsplit(args.url)
+    path = f"/api/artworks/{args.artwork}/events"
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(open_stream(url.hostname, url.port or 80, path) for _ in range(args.connections)),
+        return_exceptions=True,
+    )
+    streams = [r for r in results if not isinstance(r, BaseException)]
+    print(f"connected {len(streams)}/{args.connections} streams "
+          f"in {time.perf_counter() - started:.2f}s")
+
+    latencies = []
+    for _ in range(args.rounds):
+        waiters = [asyncio.ensure_future(next_event(reader)) for reader, _ in streams]
+        sent = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(
+            None, like, args.url, args.artwork, args.token
+        )
+        received = await asyncio.wait_for(asyncio.gather(*waiters), timeout=args.timeout)
+        latencies.extend(t - sent for t in received)
+        await asyncio.sleep(args.pause)
+
+    for _, writer in streams:
+        writer.close()
+
+    if latencies:
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"deliveries: {len(latencies)}")
+        print(f"latency p50={statistics.median(latencies) * 1000:.1f}ms "
+              f"p99={p99 * 1000:.1f}ms max={latencies[-1] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--artwork", type=int, default=1)
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--pause", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""Cold-start time of a worker: import the app and run create_app().
+
+Each run is a fresh interpreter started with -X importtime, so the report
+shows both wall time and the slowest top-level imports. Exits non-zero when
+the median boot exceeds the budget or a module that should load lazily
+(Cloudinary, NumPy, SciPy) is imported at boot.
+
+    python benchmarks/startup_bench.py --runs 10 --budget-ms 800
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BOOT = 'from app import create_app; create_app()'
+LAZY_MODULES = ('cloudinary', 'numpy', 'scipy')
+
+
+def boot(env):
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT],
+        cwd=BACKEND, env=env, capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - started, proc.stderr
+
+
+def parse_importtime(stderr):
+    """Return ({top-level module: cumulative microseconds}, every imported module)."""
+    top_level = {}
+    everything = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented beneath their parent
+        everything.add(name.strip())
+        if not name[1:].startswith(' '):
+            top_level[name.strip()] = int(cumulative)
+    return top_level, everything
+
+
+def main(args):
+    workdir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        DATABASE_URI=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        DETAIL_CACHE_PATH=os.path.join(workdir, 'detail-cache'),
+    )
+
+    # The first boot creates and stamps the schema; later boots only check the stamp
+    first, _ = boot(env)
+    timings = []
+    imports, everything = {}, set()
+    for _ in range(args.runs):
+        elapsed, stderr = boot(env)
+        timings.append(elapsed)
+        imports, everything = parse_importtime(stderr)
+
+    median = statistics.median(timings)
+    print(f'first boot (creates schema): {first * 1000:.0f}ms')
+    print(f'warm boot median over {args.runs} runs: {median * 1000:.0f}ms (budget {args.budget_ms}ms)')
+    print('slowest top-level imports:')
+    for name, micros in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'  {micros / 1000:8.1f}ms  {name}')
+
+    failures = []
+    if median * 1000 > args.budget_ms:
+        failures.append(f'median boot {median * 1000:.0f}ms exceeds budget {args.budget_ms}ms')
+    eager = [name for name in everything if name.split('.')[0] in LAZY_MODULES]
+    if eager:
+        failures.append(f"imported at boot but should be lazy: {', '.join(sorted(eager))}")
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=1000.0)
+    parser.add_argument('--top', type=int, default=10)
+    main(parser.parse_args())
@@ -0,0 +1,74 @@
+"""Latency of GET /api/artworks?sort=trending as the catalog grows.
+
+Each catalog size is loaded into a fresh in-memory database; the median
+request time should stay flat because the page is read off the
+popularity_score index instead of sorting the table.
+
+    python benchmarks/trending_bench.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def run(size, requests):
+    os.environ['DATABASE_URI'] = 'sqlite://'
+    from app import create_app, db
+    from app.models.artwork import Artwork
+    from app.models.reaction import ArtworkReaction
+    from app.models.user import User
+
+    app = create_app()
+    with app.app_context():
+        artist = User(username='bench', email='bench@example.com', is_artist=True)
+        artist.set_password('bench')
+        db.session.add(artist)
+        db.session.commit()
+
+        categories = ['Abstract', 'Urban', 'Landscape', 'Portrait']
+        for start in range(0, size, 10000):
+            ids = range(start + 1, min(start + 10000, size) + 1)
+            chosen = [random.choice(categories) for _ in ids]
+            db.session.execute(Artwork.__table__.insert(), [{
+                'id': i,
+                'title': f'Artwork {i}',
+                'image_url': 'https://example.com/a.jpg',
+                'artist_id': artist.id,
+                'category': category,
+            } for i, category in zip(ids, chosen)])
+            db.session.execute(ArtworkReaction.__table__.insert(), [{
+                'artwork_id': i,
+                'category': category,
+                'likes': random.randint(0, 1000),
+                'dislikes': 0,
+                'popularity_score': random.random() * 100,
+            } for i, category in zip(ids, chosen)])
+        db.session.commit()
+
+    client = app.test_client()
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get('/api/artworks?sort=trending&per_page=20')
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f'{size:>9} artworks: median {run(size, args.requests) * 1000:.2f}ms')
@@ -0,0 +1,107 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Read when app.detail_cache is imported; the cache is re-keyed per database
+os.environ['DETAIL_CACHE_PATH'] = os.path.join(tempfile.mkdtemp(), 'detail-cache')
+
+
+@pytest.fixture(params=['shared', 'separate'])
+def database(request, tmp_path, monkeypatch):
+    """Point the app at fresh SQLite files, with interactions sharing or splitting the database.
+
+    Returns the catalog database path, so a test can seed it before booting.
+    """
+    monkeypatch.setenv('SECRET_KEY', 'test-secret')
+    monkeypatch.setenv('DATABASE_URI', f"sqlite:///{tmp_path / 'catalog.db'}")
+    if request.param == 'separate':
+        monkeypatch.setenv('INTERACTIONS_DATABASE_URI', f"sqlite:///{tmp_path / 'interactions.db'}")
+    else:
+        monkeypatch.delenv('INTERACTIONS_DATABASE_URI', raising=False)
+    monkeypatch.setenv('SSE_CHANNEL_PATH', str(tmp_path / 'events.db'))
+    return tmp_path / 'catalog.db'
+
+
+@pytest.fixture
+def make_app(database):
+    """Boot the app on the test database; call again to simulate a restart."""
+    from app import create_app, db
+    apps = []
+
+    def make_app():
+        apps.append(create_app())
+        return apps[-1]
+    yield make_app
+
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in set(db.engines.values()):
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """Register a user and return (user id, auth headers)."""
+    def login(username, is_artist=False):
+        email = f'{username}@example.com'
+        response = client.post('/api/register', json={
+            'username': username, 'email': email, 'password': 'secret', 'is_artist': is_artist
+        })
+        assert response.status_code == 201, response.get_json()
+        response = client.post('/api/login', json={'email': email, 'password': 'secret'})
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        return body['user']['id'], {'Authorization': f"Bearer {body['token']}"}
+    return login
+
+
+@pytest.fixture
+def create_artwork(client):
+    """Post an artwork as the given artist and return its JSON."""
+    def create_artwork(headers, **fields):
+        data = dict({'title': 'Untitled', 'image_url': 'https://example.com/a.jpg'}, **fields)
+        response = client.post('/api/artworks', json=data, headers=headers)
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['artwork']
+    return create_artwork
+
+
+@pytest.fixture
+def statements(app):
+    """Return a context manager that collects the SQL sent to every database in its block."""
+    from sqlalchemy import event
+    from app import db
+
+    @contextmanager
+    def statements():
+        sent = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            sent.append(statement)
+
+        with app.app_context():
+            engines = set(db.engines.values())
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield sent
+        finally:
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', record)
+    return statements
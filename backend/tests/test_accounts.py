@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.models.artwork import Artwork
+from app.models.comment import Comment
+from app.models.favorite import Favorite
+from app.models.reaction import ArtworkReaction
+from app.models.user import User
+
+
+def deletes(sent, table):
+    return [s for s in sent if s.lstrip().startswith(f'DELETE FROM {table}')]
+
+
+@pytest.fixture
+def gallery(client, login, create_artwork):
+    """A painter with two artworks and three fans who favorite and comment on them."""
+    painter_id, painter = login('painter', is_artist=True)
+    sculptor_id, sculptor = login('sculptor', is_artist=True)
+    fans = [login(f'fan{i}')[1] for i in range(3)]
+    painted = [create_artwork(painter, title=f'Painting {i}', category='painting', medium='oil')['id']
+               for i in range(2)]
+    bust = create_artwork(sculptor, title='Bust', category='sculpture')['id']
+
+    for headers in fans:
+        for artwork_id in painted:
+            assert client.post(f'/api/favorites/{artwork_id}', headers=headers).status_code == 201
+            client.post(f'/api/artworks/{artwork_id}/comments', json={'content': 'Lovely'}, headers=headers)
+    # The painter's own interactions with someone else's work
+    client.post(f'/api/favorites/{bust}', headers=painter)
+    client.post(f'/api/artworks/{bust}/comments', json={'content': 'Nice'}, headers=painter)
+    return {'painter': (painter_id, painter), 'sculptor': (sculptor_id, sculptor),
+            'painted': painted, 'bust': bust}
+
+
+def test_deleting_an_artwork_removes_its_rows_in_bulk(app, client, statements, gallery):
+    artwork_id = gallery['painted'][0]
+    with statements() as sent:
+        response = client.delete(f'/api/artworks/{artwork_id}', headers=gallery['painter'][1])
+    assert response.status_code == 200
+
+    # One statement per table, however many favorites and comments there were
+    assert len(deletes(sent, 'favorites')) == 1
+    assert len(deletes(sent, 'comments')) == 1
+    # Favorites are counted for the artist's totals but never loaded
+    assert not any(s.lstrip().startswith('SELECT favorites.') for s in sent)
+    with app.app_context():
+        assert Favorite.query.filter_by(artwork_id=artwork_id).count() == 0
+        assert Comment.query.filter_by(artwork_id=artwork_id).count() == 0
+        assert db.session.get(ArtworkReaction, artwork_id) is None
+        assert Favorite.query.count() == 3 + 1
+
+
+def test_deleting_an_account_removes_everything_it_owns(app, client, statements, gallery):
+    painter_id, painter = gallery['painter']
+    bust = gallery['bust']
+    with statements() as sent:
+        response = client.delete('/api/user', headers=painter)
+    assert response.status_code == 200
+    assert response.get_json()['deleted_artworks'] == 2
+    assert len(deletes(sent, 'artworks')) == 1
+
+    with app.app_context():
+        assert db.session.get(User, painter_id) is None
+        assert Artwork.query.filter_by(artist_id=painter_id).count() == 0
+        assert Favorite.query.filter(Favorite.artwork_id.in_(gallery['painted'])).count() == 0
+        assert Comment.query.filter(Comment.artwork_id.in_(gallery['painted'])).count() == 0
+        assert ArtworkReaction.query.filter(ArtworkReaction.artwork_id.in_(gallery['painted'])).count() == 0
+        # Their favorite and comment on the sculpture went with them
+        assert Favorite.query.count() == 0
+        assert Comment.query.count() == 0
+        assert db.session.get(ArtworkReaction, bust).comment_count == 0
+
+    facets = client.get('/api/artworks/facets').get_json()['facets']
+    assert facets['category'] == {'sculpture': 1}
+    assert facets['medium'] == {}
+    assert client.get(f"/api/artworks/{gallery['painted'][0]}").status_code == 404
+    assert client.get(f'/api/artworks/{bust}').status_code == 200
+
+
+def test_catalog_foreign_keys_cascade(app, gallery):
+    painter_id, _ = gallery['painter']
+    with app.app_context():
+        assert db.session.execute(text('PRAGMA foreign_keys')).scalar() == 1
+        # Deleting the user row alone takes their artworks with it
+        db.session.execute(text('DELETE FROM users WHERE id = :id'), {'id': painter_id})
+        db.session.commit()
+        assert Artwork.query.filter_by(artist_id=painter_id).count() == 0
+        assert Artwork.query.count() == 1
@@ -0,0 +1,168 @@
+import threading
+import time
+
+import pytest
+
+from app.admission import RouteClass, Shed
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def queue_request(route_class, outcomes, name):
+    """Start a thread that waits for a slot, records the outcome and releases."""
+    def run():
+        try:
+            route_class.acquire()
+        except Shed as shed:
+            outcomes.append((name, 'shed', shed.retry_after))
+            return
+        outcomes.append((name, 'admitted', None))
+        route_class.release()
+
+    queued = route_class.snapshot()['queued']
+    thread = threading.Thread(target=run)
+    thread.start()
+    wait_until(lambda: route_class.snapshot()['queued'] > queued)
+    return thread
+
+
+def test_waiters_are_admitted_in_arrival_order():
+    route_class = RouteClass('test', limit=1, target_ms=1000, interval_ms=1000, max_wait_ms=5000)
+    route_class.acquire()
+    outcomes = []
+    threads = [queue_request(route_class, outcomes, i) for i in range(5)]
+
+    route_class.release()
+    for thread in threads:
+        thread.join()
+    assert outcomes == [(i, 'admitted', None) for i in range(5)]
+
+
+def test_standing_queue_is_shed_from_the_head():
+    route_class = RouteClass('test', limit=1, target_ms=20, interval_ms=50, max_wait_ms=5000)
+    route_class.acquire()
+    outcomes = []
+    threads = [queue_request(route_class, outcomes, name) for name in ('old', 'older')]
+    # The queue has not drained for longer than interval
+    time.sleep(0.1)
+    threads.append(queue_request(route_class, outcomes, 'fresh'))
+
+    route_class.release()
+    for thread in threads:
+        thread.join()
+    assert sorted(outcomes, key=lambda o: o[0]) == [
+        ('fresh', 'admitted', None), ('old', 'shed', 1), ('older', 'shed', 1)
+    ]
+    snapshot = route_class.snapshot()
+    assert (snapshot['admitted'], snapshot['shed'], snapshot['queued']) == (2, 2, 0)
+    assert snapshot['queue_delay_max_ms'] < 20
+
+
+def test_burst_may_wait_past_target():
+    route_class = RouteClass('test', limit=1, target_ms=20, interval_ms=1000, max_wait_ms=5000)
+    route_class.acquire()
+    outcomes = []
+    thread = queue_request(route_class, outcomes, 'burst')
+    time.sleep(0.05)
+
+    route_class.release()
+    thread.join()
+    assert outcomes == [('burst', 'admitted', None)]
+
+
+def test_request_gives_up_after_max_wait():
+    route_class = RouteClass('test', limit=1, target_ms=1000, interval_ms=1000, max_wait_ms=30)
+    route_class.acquire()
+    with pytest.raises(Shed):
+        route_class.acquire()
+    snapshot = route_class.snapshot()
+    assert (snapshot['shed'], snapshot['queued'], snapshot['in_flight']) == (1, 0, 1)
+
+
+def test_admitted_delay_stays_near_target_under_overload():
+    # Twice the arrivals the class can serve, for many intervals
+    route_class = RouteClass('test', limit=2, target_ms=20, interval_ms=40, max_wait_ms=2000)
+    delays, lock = [], threading.Lock()
+
+    def run():
+        started = time.monotonic()
+        try:
+            route_class.acquire()
+        except Shed:
+            return
+        with lock:
+            delays.append(time.monotonic() - started)
+        time.sleep(0.04)
+        route_class.release()
+
+    threads = []
+    for _ in range(60):
+        threads.append(threading.Thread(target=run))
+        threads[-1].start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    assert route_class.shed > 0
+    # Waits beyond target only happen while the first interval absorbs the burst
+    assert route_class.snapshot()['queue_delay_max_ms'] <= 40 + 5
+    assert sorted(delays)[-5] < 0.02 + 0.01
+
+
+def test_classification(app):
+    controller = app.extensions['admission']
+    assert controller.classify('auth.login', 'POST') == 'auth'
+    assert controller.classify('auth.register', 'POST') == 'auth'
+    assert controller.classify('artwork.create_artwork', 'POST') == 'upload'
+    assert controller.classify('comments.add_comment', 'POST') == 'comment'
+    assert controller.classify('artwork.get_artworks', 'GET') == 'read'
+    assert controller.classify('artwork.like_artwork', 'POST') == 'write'
+    assert controller.classify('events.artwork_events', 'GET') is None
+
+
+def test_shed_request_gets_503_with_retry_after(app, client):
+    reads = app.extensions['admission'].classes['read']
+    reads.limit = 0
+    reads.max_wait = 0.01
+
+    response = client.get('/api/artworks')
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    assert client.get('/api/metrics').status_code == 200
+
+
+def test_login_attempts_get_429_with_retry_after(client, login):
+    login('fan')
+    statuses = [
+        client.post('/api/login', json={'email': 'fan@example.com', 'password': 'wrong'}).status_code
+        for _ in range(5)
+    ]
+    # login() used one of the account's five attempts
+    assert statuses == [401] * 4 + [429]
+    response = client.post('/api/login', json={'email': 'fan@example.com', 'password': 'secret'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def register(client, i, forwarded_for):
+    return client.post('/api/register', json={
+        'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'secret'
+    }, headers={'X-Forwarded-For': forwarded_for}).status_code
+
+
+def test_trusted_proxy_keys_on_the_forwarded_address(make_app, monkeypatch):
+    monkeypatch.setenv('TRUSTED_PROXIES', '1')
+    client = make_app().test_client()
+    assert [register(client, i, '203.0.113.1') for i in range(6)] == [201] * 5 + [429]
+    assert register(client, 6, '203.0.113.2') == 201
+
+
+def test_forwarded_address_is_ignored_without_trusted_proxies(make_app, monkeypatch):
+    monkeypatch.delenv('TRUSTED_PROXIES', raising=False)
+    client = make_app().test_client()
+    assert [register(client, i, f'203.0.113.{i}') for i in range(6)] == [201] * 5 + [429]
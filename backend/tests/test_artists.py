@@ -0,0 +1,111 @@
+from app import artists, db
+
+
+def stats(client, artist_id):
+    response = client.get(f'/api/artists/{artist_id}')
+    assert response.status_code == 200
+    return response.get_json()['stats']
+
+
+def assert_no_drift(app):
+    with app.app_context():
+        report = artists.reconcile(dry_run=True)
+    assert report['drifted'] == 0, report
+
+
+def test_totals_follow_likes_favorites_and_deletes(app, client, login, create_artwork):
+    artist_id, artist = login('painter', is_artist=True)
+    other_id, other = login('sculptor', is_artist=True)
+    _, fan = login('fan')
+    first = create_artwork(artist, title='First')
+    second = create_artwork(artist, title='Second')
+    sculpture = create_artwork(other, title='Bust')
+
+    client.post(f"/api/artworks/{first['id']}/like", headers=fan)
+    client.post(f"/api/artworks/{first['id']}/like", headers=other)
+    client.post(f"/api/artworks/{second['id']}/dislike", headers=fan)
+    client.post(f"/api/favorites/{first['id']}", headers=fan)
+    client.post(f"/api/favorites/{second['id']}", headers=fan)
+    client.post(f"/api/favorites/{sculpture['id']}", headers=fan)
+
+    totals = stats(client, artist_id)
+    assert {k: totals[k] for k in artists.COUNTERS} == {
+        'artwork_count': 2, 'likes': 2, 'dislikes': 1, 'favorites': 2
+    }
+    assert totals['latest_upload'] == second['created_at']
+    assert_no_drift(app)
+
+    assert client.delete(f"/api/favorites/{first['id']}", headers=fan).status_code == 200
+    assert stats(client, artist_id)['favorites'] == 1
+
+    # Deleting the newest artwork takes its counters off and rolls latest_upload back
+    assert client.delete(f"/api/artworks/{second['id']}", headers=artist).status_code == 200
+    totals = stats(client, artist_id)
+    assert {k: totals[k] for k in artists.COUNTERS} == {
+        'artwork_count': 1, 'likes': 2, 'dislikes': 0, 'favorites': 0
+    }
+    assert totals['latest_upload'] == first['created_at']
+    assert_no_drift(app)
+
+    # A deleted account's favorites come off the artists it favorited
+    assert client.delete('/api/user', headers=fan).status_code == 200
+    assert stats(client, other_id)['favorites'] == 0
+    assert_no_drift(app)
+
+    # A deleted artist's totals go with the account
+    client.post(f"/api/favorites/{first['id']}", headers=other)
+    assert client.delete('/api/user', headers=artist).status_code == 200
+    assert client.get(f'/api/artists/{artist_id}').status_code == 404
+    assert stats(client, other_id)['artwork_count'] == 1
+    assert_no_drift(app)
+
+
+def test_reconcile_corrects_drift(app, client, login, create_artwork):
+    artist_id, artist = login('painter', is_artist=True)
+    create_artwork(artist)
+
+    with app.app_context():
+        artists.adjust(artist_id, likes=5)
+        db.session.commit()
+
+        report = artists.reconcile()
+        assert report['drifted'] == 1
+        assert report['drift']['likes'] == 5
+    assert stats(client, artist_id)['likes'] == 0
+    assert_no_drift(app)
+
+
+def test_row_inserted_by_a_concurrent_writer_is_added_to(app, monkeypatch):
+    from sqlalchemy import insert
+    from sqlalchemy.orm import Query
+
+    from app.models.artist import ArtistStats
+
+    update = Query.update
+
+    def racing_update(query, values, **kwargs):
+        # Another writer creates the row just after this UPDATE missed it
+        monkeypatch.setattr(Query, 'update', update)
+        db.session.execute(insert(ArtistStats).values(
+            artist_id=7, artwork_count=1, likes=2, dislikes=0, favorites=0
+        ))
+        return 0
+
+    with app.app_context():
+        monkeypatch.setattr(Query, 'update', racing_update)
+        artists.adjust(7, likes=1)
+        db.session.commit()
+        assert artists.get(7)['likes'] == 3
+        assert artists.get(7)['artwork_count'] == 1
+
+
+def test_former_artist_keeps_their_page(client, login, create_artwork):
+    artist_id, artist = login('painter', is_artist=True)
+    fan_id, _ = login('fan')
+    create_artwork(artist)
+
+    response = client.put('/api/update-artist-status', json={'is_artist': False}, headers=artist)
+    assert response.status_code == 200
+    assert stats(client, artist_id)['artwork_count'] == 1
+    # Someone who never uploaded still has no artist page
+    assert client.get(f'/api/artists/{fan_id}').status_code == 404
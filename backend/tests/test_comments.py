@@ -0,0 +1,181 @@
+import queue
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import comments, db
+from app.events import broker
+from app.models.comment import Comment
+from app.models.reaction import ArtworkReaction
+
+
+@pytest.fixture
+def artwork(login, create_artwork):
+    _, headers = login('painter', is_artist=True)
+    return create_artwork(headers)
+
+
+def walk(client, artwork_id, order, limit):
+    """Follow next_cursor through every page and return the comment ids."""
+    ids, cursor = [], None
+    while True:
+        params = {'order': order, 'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get(f'/api/artworks/{artwork_id}/comments', query_string=params)
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['count'] <= limit
+        ids += [comment['id'] for comment in body['comments']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_pages_split_comments_with_the_same_timestamp(app, client, artwork):
+    posted_at = datetime(2024, 1, 1, 12, 0, 0)
+    with app.app_context():
+        rows = [Comment(artwork_id=artwork['id'], user_id=1, content=f'Comment {i}', created_at=posted_at)
+                for i in range(5)]
+        rows.append(Comment(artwork_id=artwork['id'], user_id=1, content='Later',
+                            created_at=datetime(2024, 1, 2)))
+        db.session.add_all(rows)
+        db.session.commit()
+        tied = [row.id for row in rows[:5]]
+        later = rows[5].id
+
+    assert walk(client, artwork['id'], 'oldest', 2) == tied + [later]
+    assert walk(client, artwork['id'], 'newest', 2) == [later] + tied[::-1]
+    # A page boundary that falls exactly on the last row ends the walk
+    assert walk(client, artwork['id'], 'oldest', 3) == tied + [later]
+
+
+def test_invalid_cursor_is_rejected(client, artwork):
+    response = client.get(f"/api/artworks/{artwork['id']}/comments", query_string={'cursor': 'not-a-cursor'})
+    assert response.status_code == 400
+
+
+def test_posting_counts_each_comment_once(client, login, artwork):
+    _, headers = login('fan')
+    for content in ('First', 'Second'):
+        response = client.post(f"/api/artworks/{artwork['id']}/comments", json={'content': content}, headers=headers)
+        assert response.status_code == 201
+        assert response.get_json()['comment']['username'] == 'fan'
+
+    detail = client.get(f"/api/artworks/{artwork['id']}").get_json()['artwork']
+    assert detail['comment_count'] == 2
+    assert walk(client, artwork['id'], 'newest', 20) == [2, 1]
+
+
+def stored(app, artwork_id):
+    with app.app_context():
+        count = Comment.query.filter_by(artwork_id=artwork_id).count()
+        counter = ArtworkReaction.query.get(artwork_id).comment_count
+    return count, counter
+
+
+def pending(artwork, content):
+    return comments.PendingComment(artwork['id'], artwork['category'], 1, 1, content)
+
+
+def test_failing_comment_does_not_fail_its_group(app, artwork):
+    writer = app.extensions['comment_writer']
+    good, bad, other = pending(artwork, 'Good'), pending(artwork, None), pending(artwork, 'Also good')
+
+    with app.app_context():
+        writer.write([good, bad, other])
+
+    assert all(p.done.is_set() for p in (good, bad, other))
+    assert good.error is None and other.error is None
+    assert bad.error is not None and bad.comment is None
+    assert good.comment['content'] == 'Good'
+    assert stored(app, artwork['id']) == (2, 2)
+
+
+def test_failure_after_commit_does_not_insert_twice(app, artwork, monkeypatch):
+    def publish(*args, **kwargs):
+        raise RuntimeError('broker is down')
+    monkeypatch.setattr(broker, 'publish', publish)
+
+    writer = app.extensions['comment_writer']
+    batch = [pending(artwork, 'One'), pending(artwork, 'Two')]
+    with app.app_context():
+        writer.write(batch)
+
+    assert all(p.done.is_set() and p.error is None for p in batch)
+    assert [p.comment['content'] for p in batch] == ['One', 'Two']
+    assert stored(app, artwork['id']) == (2, 2)
+
+
+def post(client, artwork, headers, content, key=None):
+    if key:
+        headers = dict(headers, **{'Idempotency-Key': key})
+    return client.post(f"/api/artworks/{artwork['id']}/comments", json={'content': content}, headers=headers)
+
+
+def test_resent_key_returns_the_stored_comment(app, client, login, artwork):
+    _, headers = login('fan')
+    first = post(client, artwork, headers, 'Lovely', key='post-1')
+    again = post(client, artwork, headers, 'Lovely', key='post-1')
+    assert (first.status_code, again.status_code) == (201, 200)
+    assert again.get_json()['comment']['id'] == first.get_json()['comment']['id']
+    assert post(client, artwork, headers, 'Lovely', key='post-2').status_code == 201
+    assert stored(app, artwork['id']) == (2, 2)
+
+
+def test_slow_commit_is_not_retryable(app, client, login, artwork, monkeypatch):
+    _, headers = login('fan')
+    writer = app.extensions['comment_writer']
+    # Hold the comment in the queue past the timeout, as a stalled writer would
+    monkeypatch.setattr(writer, '_ensure_writer', lambda: None)
+    writer.timeout = 0.05
+
+    response = post(client, artwork, headers, 'Lovely', key='post-1')
+    assert response.status_code == 202
+    assert 'Retry-After' not in response.headers
+
+    # The comment commits late; resending the key finds it instead of adding it again
+    with app.app_context():
+        writer.write([writer._queue.get_nowait()])
+    response = post(client, artwork, headers, 'Lovely', key='post-1')
+    assert response.status_code == 200
+    assert stored(app, artwork['id']) == (1, 1)
+
+
+def test_full_queue_is_retryable(app, client, login, artwork, monkeypatch):
+    _, headers = login('fan')
+    writer = app.extensions['comment_writer']
+    monkeypatch.setattr(writer, '_queue', queue.Queue(maxsize=1))
+    writer._queue.put_nowait(pending(artwork, 'Waiting'))
+
+    response = post(client, artwork, headers, 'Lovely')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert stored(app, artwork['id']) == (0, 0)
+
+
+def test_same_key_in_one_group_commits_once(app, artwork):
+    writer = app.extensions['comment_writer']
+    batch = [comments.PendingComment(artwork['id'], None, 1, 1, 'Lovely', 'post-1') for _ in range(2)]
+    with app.app_context():
+        writer.write(batch)
+
+    assert batch[0].error is None
+    assert isinstance(batch[1].error, IntegrityError)
+    assert stored(app, artwork['id']) == (1, 1)
+
+
+def test_deleted_account_comments_leave_cached_details(client, login, artwork, monkeypatch):
+    _, headers = login('fan')
+    post(client, artwork, headers, 'Lovely')
+    # Cache the detail with the comment counted
+    assert client.get(f"/api/artworks/{artwork['id']}").get_json()['artwork']['comment_count'] == 1
+
+    published = []
+    monkeypatch.setattr(broker, 'publish', lambda artwork_id, category=None, **counts: published.append(
+        (artwork_id, counts)))
+    assert client.delete('/api/user', headers=headers).status_code == 200
+
+    assert client.get(f"/api/artworks/{artwork['id']}").get_json()['artwork']['comment_count'] == 0
+    assert (artwork['id'], {'comment_count': 0, 'favorites': 0}) in published
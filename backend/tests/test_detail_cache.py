@@ -0,0 +1,122 @@
+import pytest
+
+from app import detail_cache
+from app.detail_cache import DetailCache, VERSION
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DetailCache(str(tmp_path / 'cache'), slots=8, slot_size=256, key=b'k' * 16)
+
+
+def test_put_then_get(cache):
+    assert cache.get(1) is None
+    assert cache.put(1, cache.version(1), b'{"id": 1}')
+    assert cache.get(1) == b'{"id": 1}'
+
+
+def test_invalidate_drops_the_blob(cache):
+    cache.put(1, cache.version(1), b'old')
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+
+def test_put_rejects_a_blob_built_before_a_version_bump(cache):
+    # The request read the version, then a write invalidated before it stored the blob
+    version = cache.version(1)
+    cache.invalidate(1)
+    assert not cache.put(1, version, b'stale')
+    assert cache.get(1) is None
+    assert cache.put(1, cache.version(1), b'fresh')
+
+
+def test_slots_shared_by_two_ids_do_not_mix(cache):
+    cache.put(1, cache.version(1), b'one')
+    assert cache.get(1 + cache.slots) is None
+    cache.put(1 + cache.slots, cache.version(1 + cache.slots), b'nine')
+    assert cache.get(1) is None
+
+
+def test_oversized_blobs_are_not_cached(cache):
+    assert not cache.put(1, cache.version(1), b'x' * cache.max_blob + b'x')
+    assert cache.get(1) is None
+
+
+def test_readers_skip_a_slot_being_written(cache):
+    cache.put(1, cache.version(1), b'blob')
+    offset = cache._slot_offset(1)
+    seq = VERSION.unpack_from(cache._map, offset)[0]
+    # A writer has bumped the sequence to odd and not finished
+    VERSION.pack_into(cache._map, offset, seq + 1)
+    assert cache.get(1) is None
+    VERSION.pack_into(cache._map, offset, seq + 2)
+    assert cache.get(1) == b'blob'
+
+
+def test_clear_drops_every_blob(cache):
+    for artwork_id in range(cache.slots):
+        cache.put(artwork_id, cache.version(artwork_id), b'blob')
+    cache.clear()
+    assert all(cache.get(artwork_id) is None for artwork_id in range(cache.slots))
+
+
+def test_another_database_key_wipes_the_file(tmp_path, cache):
+    cache.put(1, cache.version(1), b'blob')
+    assert DetailCache(str(tmp_path / 'cache'), slots=8, slot_size=256, key=b'k' * 16).get(1) == b'blob'
+    assert DetailCache(str(tmp_path / 'cache'), slots=8, slot_size=256, key=b'o' * 16).get(1) is None
+
+
+@pytest.fixture
+def artwork(login, create_artwork):
+    _, headers = login('painter', is_artist=True)
+    return create_artwork(headers, title='First'), headers
+
+
+def detail(client, artwork_id):
+    return client.get(f'/api/artworks/{artwork_id}').get_json()['artwork']
+
+
+def cached(artwork_id):
+    return detail_cache.get_cache().get(artwork_id)
+
+
+def test_detail_is_served_from_the_cache(app, client, artwork):
+    artwork, _ = artwork
+    detail(client, artwork['id'])
+    assert cached(artwork['id']) is not None
+
+    cache = detail_cache.get_cache()
+    cache.put(artwork['id'], cache.version(artwork['id']), b'{"artwork": {"served": "from cache"}}')
+    assert detail(client, artwork['id']) == {'served': 'from cache'}
+    # Sparse fieldsets are built per request
+    response = client.get(f"/api/artworks/{artwork['id']}", query_string={'fields': 'id,title'})
+    assert response.get_json()['artwork'] == {'id': artwork['id'], 'title': 'First'}
+
+
+def test_writes_invalidate_the_detail(client, login, artwork):
+    artwork, headers = artwork
+    _, fan = login('fan')
+    artwork_id = artwork['id']
+
+    def changes(method, path, expect, **kwargs):
+        detail(client, artwork_id)
+        assert cached(artwork_id) is not None
+        assert getattr(client, method)(path, headers=kwargs.pop('auth', fan), **kwargs).status_code in (200, 201)
+        assert cached(artwork_id) is None
+        if expect is not None:
+            assert {k: detail(client, artwork_id)[k] for k in expect} == expect
+
+    changes('post', f'/api/artworks/{artwork_id}/like', {'likes': 1})
+    changes('post', f'/api/artworks/{artwork_id}/dislike', {'dislikes': 1})
+    changes('post', f'/api/artworks/{artwork_id}/comments', {'comment_count': 1}, json={'content': 'Lovely'})
+    changes('put', f'/api/artworks/{artwork_id}', {'title': 'Renamed'}, json={'title': 'Renamed'}, auth=headers)
+    changes('delete', f'/api/artworks/{artwork_id}', None, auth=headers)
+    assert client.get(f'/api/artworks/{artwork_id}').status_code == 404
+
+
+def test_boot_drops_blobs_from_before(make_app, app, client, artwork):
+    artwork, _ = artwork
+    detail(client, artwork['id'])
+    assert cached(artwork['id']) is not None
+    make_app()
+    assert cached(artwork['id']) is None
@@ -0,0 +1,108 @@
+import json
+
+from app import events
+from app.events import EventBroker, EventChannel
+
+
+def received(subscription):
+    """Drain a subscription and return the payloads of its counts events."""
+    payloads = []
+    while not subscription.queue.empty():
+        event, data = subscription.queue.get_nowait().strip().split('\n')
+        assert event == 'event: counts'
+        payload = json.loads(data[len('data: '):])
+        del payload['sent_at']
+        payloads.append(payload)
+    return payloads
+
+
+def quiet_broker(channel=None):
+    # A window this long keeps the background flusher out of the way
+    return EventBroker(window=3600, channel=channel)
+
+
+def test_updates_within_a_window_are_coalesced():
+    broker = quiet_broker()
+    subscription = broker.subscribe(artwork_id=1)
+    broker.publish(1, 'painting', likes=1, dislikes=0)
+    broker.publish(1, likes=2)
+    broker.publish(1, favorites=5)
+
+    broker.flush()
+    assert received(subscription) == [
+        {'artwork_id': 1, 'category': 'painting', 'likes': 2, 'dislikes': 0, 'favorites': 5}
+    ]
+    broker.flush()
+    assert received(subscription) == []
+
+
+def test_events_fan_out_by_artwork_category_and_firehose():
+    broker = quiet_broker()
+    by_artwork = [broker.subscribe(artwork_id=1) for _ in range(3)]
+    other_artwork = broker.subscribe(artwork_id=2)
+    by_category = broker.subscribe(category='painting')
+    other_category = broker.subscribe(category='sketch')
+    firehose = broker.subscribe()
+    assert broker.subscriber_count() == 7
+
+    broker.publish(1, 'painting', likes=1)
+    broker.flush()
+    for subscription in by_artwork + [by_category, firehose]:
+        assert received(subscription) == [{'artwork_id': 1, 'category': 'painting', 'likes': 1}]
+    assert received(other_artwork) == []
+    assert received(other_category) == []
+
+    for subscription in by_artwork:
+        broker.unsubscribe(subscription)
+    assert broker.subscriber_count() == 4
+    broker.publish(1, 'painting', likes=2)
+    broker.flush()
+    assert all(received(subscription) == [] for subscription in by_artwork)
+
+
+def test_slow_subscriber_keeps_the_newest_events():
+    broker = quiet_broker()
+    subscription = broker.subscribe()
+    for likes in range(events.SUBSCRIBER_QUEUE_SIZE + 10):
+        broker.publish(1, likes=likes)
+        broker.flush()
+
+    payloads = received(subscription)
+    assert len(payloads) == events.SUBSCRIBER_QUEUE_SIZE
+    assert payloads[-1]['likes'] == events.SUBSCRIBER_QUEUE_SIZE + 9
+
+
+def test_channel_relays_between_workers(tmp_path):
+    path = str(tmp_path / 'events.db')
+    first, second = quiet_broker(EventChannel(path)), quiet_broker(EventChannel(path))
+    watching_first = first.subscribe(artwork_id=1)
+    watching_second = second.subscribe(artwork_id=1)
+    # Both workers are running before anything is published
+    first.flush()
+    second.flush()
+
+    first.publish(1, likes=1)
+    second.publish(1, dislikes=1)
+    first.flush()
+    second.flush()
+    assert received(watching_first) == [{'artwork_id': 1, 'likes': 1}]
+    # The second worker merges both workers' updates into one event
+    assert received(watching_second) == [{'artwork_id': 1, 'likes': 1, 'dislikes': 1}]
+
+    first.flush()
+    assert received(watching_first) == [{'artwork_id': 1, 'dislikes': 1}]
+
+
+def test_reactions_publish_counts(client, login, create_artwork, monkeypatch):
+    _, artist = login('painter', is_artist=True)
+    _, fan = login('fan')
+    artwork = create_artwork(artist, category='painting')
+
+    published = []
+    monkeypatch.setattr(events.broker, 'publish', lambda artwork_id, category=None, **counts: published.append(
+        (artwork_id, category, counts)))
+    client.post(f"/api/artworks/{artwork['id']}/like", headers=fan)
+    client.post(f"/api/favorites/{artwork['id']}", headers=fan)
+
+    assert published[0] == (artwork['id'], 'painting', {'likes': 1, 'dislikes': 0})
+    assert published[1][2]['favorites'] == 1
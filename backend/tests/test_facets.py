@@ -0,0 +1,100 @@
+def facets(client, **params):
+    response = client.get('/api/artworks/facets', query_string=params)
+    assert response.status_code == 200
+    return response.get_json()['facets']
+
+
+def test_counts_follow_create_update_and_delete(client, login, create_artwork):
+    artist_id, headers = login('painter', is_artist=True)
+    oil = create_artwork(headers, category='painting', medium='oil', year=1999)
+    create_artwork(headers, category='painting', medium='acrylic', year='1999')
+
+    assert facets(client) == {
+        'category': {'painting': 2},
+        'medium': {'oil': 1, 'acrylic': 1},
+        'year': {'1999': 2},
+    }
+
+    response = client.put(f"/api/artworks/{oil['id']}", json={
+        'category': 'sketch', 'medium': 'charcoal', 'year': 2001
+    }, headers=headers)
+    assert response.status_code == 200
+    assert facets(client) == {
+        'category': {'painting': 1, 'sketch': 1},
+        'medium': {'acrylic': 1, 'charcoal': 1},
+        'year': {'1999': 1, '2001': 1},
+    }
+    assert facets(client, category='sketch') == {'medium': {'charcoal': 1}, 'year': {'2001': 1}}
+    assert facets(client, artist_id=artist_id)['category'] == {'painting': 1, 'sketch': 1}
+
+    assert client.delete(f"/api/artworks/{oil['id']}", headers=headers).status_code == 200
+    assert facets(client) == {
+        'category': {'painting': 1},
+        'medium': {'acrylic': 1},
+        'year': {'1999': 1},
+    }
+    assert facets(client, category='sketch') == {'medium': {}, 'year': {}}
+
+
+def test_counts_match_a_rebuild(app, client, login, create_artwork):
+    _, headers = login('painter', is_artist=True)
+    first = create_artwork(headers, category='painting', medium='oil', year=1999)
+    create_artwork(headers, category='painting', medium='oil')
+    client.put(f"/api/artworks/{first['id']}", json={'medium': 'ink'}, headers=headers)
+
+    counted = facets(client)
+    from app import facets as facet_counts
+    with app.app_context():
+        facet_counts.rebuild()
+    assert facets(client) == counted
+
+
+def test_non_numeric_year_is_rejected(client, login, create_artwork):
+    _, headers = login('painter', is_artist=True)
+    response = client.post('/api/artworks', json={
+        'title': 'Untitled', 'image_url': 'https://example.com/a.jpg', 'year': 'circa 1900'
+    }, headers=headers)
+    assert response.status_code == 400
+
+    artwork = create_artwork(headers, year=1999)
+    response = client.put(f"/api/artworks/{artwork['id']}", json={'year': 'unknown'}, headers=headers)
+    assert response.status_code == 400
+    assert facets(client)['year'] == {'1999': 1}
+
+
+def test_stored_text_years_are_skipped(app, client, login, create_artwork):
+    _, headers = login('painter', is_artist=True)
+    create_artwork(headers, year=1999)
+
+    from app import db, facets as facet_counts
+    from app.models.artwork import Artwork
+    with app.app_context():
+        # Rows written before years were validated
+        db.session.add(Artwork(title='Old', image_url='https://example.com/b.jpg', artist_id=1, year='circa 1900'))
+        db.session.commit()
+        facet_counts.rebuild()
+    assert facets(client)['year'] == {'1999': 1}
+
+
+def test_row_inserted_by_a_concurrent_writer_is_added_to(app, monkeypatch):
+    from sqlalchemy.orm import Query
+
+    from app import db, facets as facet_counts
+    from app.models.facet import FacetCount
+
+    update = Query.update
+
+    def racing_update(query, values, **kwargs):
+        # Another writer inserts the gallery-wide row just after this UPDATE missed it
+        monkeypatch.setattr(Query, 'update', update)
+        db.session.execute(FacetCount.__table__.insert().values(
+            scope='', scope_value='', facet='medium', value='oil', count=2
+        ))
+        return 0
+
+    with app.app_context():
+        monkeypatch.setattr(Query, 'update', racing_update)
+        facet_counts.apply({'artist_id': 7, 'category': None, 'medium': 'oil', 'year': None}, 1)
+        db.session.commit()
+        assert facet_counts.counts()['medium'] == {'oil': 3}
+        assert facet_counts.counts('artist', '7')['medium'] == {'oil': 1}
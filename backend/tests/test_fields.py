@@ -0,0 +1,60 @@
+import pytest
+
+
+def artwork_selects(sent):
+    return [s for s in sent if s.lstrip().startswith('SELECT') and 'FROM artworks' in s]
+
+
+@pytest.fixture
+def artwork(login, create_artwork):
+    _, headers = login('painter', is_artist=True)
+    return create_artwork(headers, title='First', description='A very long description')
+
+
+def test_list_loads_only_the_requested_columns(statements, client, artwork):
+    with statements() as sent:
+        response = client.get('/api/artworks', query_string={'fields': 'title,artist_name'})
+    assert response.status_code == 200
+    assert response.get_json()['artworks'] == [{'id': artwork['id'], 'title': 'First', 'artist_name': 'painter'}]
+
+    selects = artwork_selects(sent)
+    assert selects and not any('description' in s or 'image_url' in s for s in selects)
+    # No counters were asked for, so the interactions database is not queried
+    assert not any('artwork_reactions' in s for s in sent)
+
+
+def test_counters_are_loaded_only_when_requested(statements, client, login, artwork):
+    _, fan = login('fan')
+    client.post(f"/api/artworks/{artwork['id']}/like", headers=fan)
+
+    with statements() as sent:
+        response = client.get('/api/artworks', query_string={'fields': 'likes', 'sort': 'popular'})
+    assert response.get_json()['artworks'] == [{'id': artwork['id'], 'likes': 1}]
+    assert not any('title' in s for s in artwork_selects(sent))
+
+
+def test_detail_and_favorites_accept_fields(statements, client, login, artwork):
+    _, fan = login('fan')
+    client.post(f"/api/favorites/{artwork['id']}", headers=fan)
+
+    with statements() as sent:
+        response = client.get(f"/api/artworks/{artwork['id']}", query_string={'fields': 'image_url'})
+        favorites = client.get('/api/favorites', query_string={'fields': 'title'}, headers=fan)
+    assert response.get_json()['artwork'] == {'id': artwork['id'], 'image_url': 'https://example.com/a.jpg'}
+    assert favorites.get_json()['favorites'] == [
+        {'id': artwork['id'], 'title': 'First', 'favorite_id': favorites.get_json()['favorites'][0]['favorite_id']}
+    ]
+    assert not any('description' in s for s in artwork_selects(sent))
+
+    # Without fields= every field is returned
+    full = client.get(f"/api/artworks/{artwork['id']}").get_json()['artwork']
+    assert full['description'] == 'A very long description'
+    assert full['artist_name'] == 'painter'
+
+
+@pytest.mark.parametrize('path', ['/api/artworks', '/api/artworks/1', '/api/favorites'])
+def test_unknown_fields_are_rejected(client, login, artwork, path):
+    _, fan = login('fan')
+    response = client.get(path, query_string={'fields': 'title,password'}, headers=fan)
+    assert response.status_code == 400
+    assert 'password' in response.get_json()['error']
@@ -0,0 +1,66 @@
+import pytest
+
+from app import db, reactions
+from app.models.artwork import Artwork
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    # Split every id lookup into several IN lists
+    monkeypatch.setattr(reactions, 'ID_BATCH_SIZE', 2)
+
+
+def artwork_lookups(sent):
+    return [s for s in sent if s.lstrip().startswith('SELECT') and 'FROM artworks' in s and ' IN (' in s]
+
+
+def test_favorites_are_fetched_in_batches_and_keep_their_order(app, client, statements, login, create_artwork,
+                                                               small_batches):
+    _, artist = login('painter', is_artist=True)
+    _, fan = login('fan')
+    ids = [create_artwork(artist, title=f'Artwork {i}')['id'] for i in range(5)]
+    favorited = [ids[3], ids[1], ids[4], ids[0], ids[2]]
+    for artwork_id in favorited:
+        client.post(f'/api/favorites/{artwork_id}', headers=fan)
+    client.post(f'/api/artworks/{ids[4]}/like', headers=fan)
+
+    with statements() as sent:
+        body = client.get('/api/favorites', headers=fan).get_json()
+    assert body['count'] == 5
+    assert [artwork['id'] for artwork in body['favorites']] == favorited
+    assert [artwork['likes'] for artwork in body['favorites']] == [0, 0, 1, 0, 0]
+    assert len(artwork_lookups(sent)) == 3
+
+    # Favorites sit on the interactions database, with no foreign key to a removed artwork
+    with app.app_context():
+        Artwork.query.filter_by(id=ids[1]).delete()
+        db.session.commit()
+    body = client.get('/api/favorites', headers=fan).get_json()
+    assert [artwork['id'] for artwork in body['favorites']] == [ids[3], ids[4], ids[0], ids[2]]
+
+
+def test_ranked_listing_filters_by_artist_across_batches(client, statements, login, create_artwork, small_batches):
+    painter_id, painter = login('painter', is_artist=True)
+    _, sculptor = login('sculptor', is_artist=True)
+    fans = [login(f'fan{i}')[1] for i in range(3)]
+    painted = [create_artwork(painter, title=f'Painting {i}')['id'] for i in range(4)]
+    sculpted = create_artwork(sculptor, title='Bust')['id']
+
+    # Likes put the paintings in the order 2, 0, then 3 and 1 tied on the id tiebreak
+    for artwork_id, likes in ((painted[2], 3), (painted[0], 2), (sculpted, 3)):
+        for headers in fans[:likes]:
+            client.post(f'/api/artworks/{artwork_id}/like', headers=headers)
+
+    with statements() as sent:
+        response = client.get('/api/artworks', query_string={
+            'sort': 'popular', 'artist_id': painter_id, 'per_page': 10
+        })
+    body = response.get_json()
+    assert [artwork['id'] for artwork in body['artworks']] == [painted[2], painted[0], painted[3], painted[1]]
+    assert [artwork['likes'] for artwork in body['artworks']] == [3, 2, 0, 0]
+    assert len(artwork_lookups(sent)) == 2
+
+    second_page = client.get('/api/artworks', query_string={
+        'sort': 'popular', 'artist_id': painter_id, 'per_page': 3, 'page': 2
+    }).get_json()
+    assert [artwork['id'] for artwork in second_page['artworks']] == [painted[1]]
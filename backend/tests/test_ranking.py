@@ -0,0 +1,48 @@
+import pytest
+
+from app import db, ranking
+from app.models.ranking import RankingState
+from app.models.reaction import ArtworkReaction
+
+
+def trending(client):
+    response = client.get('/api/artworks', query_string={'sort': 'trending'})
+    assert response.status_code == 200
+    return [artwork['id'] for artwork in response.get_json()['artworks']]
+
+
+def score(app, artwork_id):
+    with app.app_context():
+        return db.session.get(ArtworkReaction, artwork_id).popularity_score
+
+
+def test_epoch_exists_before_the_first_event(app):
+    with app.app_context():
+        assert db.session.get(RankingState, 1) is not None
+
+
+def test_unfavorite_takes_back_the_favorite(app, client, login, create_artwork):
+    _, artist = login('painter', is_artist=True)
+    _, fan = login('fan')
+    artwork = create_artwork(artist)
+
+    client.post(f"/api/favorites/{artwork['id']}", headers=fan)
+    assert score(app, artwork['id']) == pytest.approx(3.0, rel=1e-3)
+    client.delete(f"/api/favorites/{artwork['id']}", headers=fan)
+    assert score(app, artwork['id']) == pytest.approx(0.0, abs=ranking.NEGLIGIBLE_SCORE)
+
+
+def test_deleted_account_favorites_leave_trending(app, client, login, create_artwork):
+    _, artist = login('painter', is_artist=True)
+    _, fan = login('fan')
+    _, other = login('other')
+    favorited = create_artwork(artist, title='Favorited')
+    liked = create_artwork(artist, title='Liked')
+
+    client.post(f"/api/favorites/{favorited['id']}", headers=fan)
+    client.post(f"/api/artworks/{liked['id']}/like", headers=other)
+    assert trending(client) == [favorited['id'], liked['id']]
+
+    assert client.delete('/api/user', headers=fan).status_code == 200
+    assert score(app, favorited['id']) == pytest.approx(0.0, abs=ranking.NEGLIGIBLE_SCORE)
+    assert trending(client) == [liked['id'], favorited['id']]
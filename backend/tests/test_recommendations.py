@@ -0,0 +1,88 @@
+import pytest
+
+from app import db, recommendations
+from app.models.similar import SimilarArtwork
+
+
+@pytest.fixture
+def gallery(client, login, create_artwork):
+    """Four artworks, favorited in pairs: a with b, and c with d."""
+    _, artist = login('painter', is_artist=True)
+    artworks = {name: create_artwork(artist, title=name)['id'] for name in 'abcd'}
+    fans = {username: login(username)[1] for username in ('fan1', 'fan2', 'fan3')}
+
+    def favorite(username, *names, method='post'):
+        for name in names:
+            response = getattr(client, method)(f'/api/favorites/{artworks[name]}', headers=fans[username])
+            assert response.status_code in (200, 201)
+
+    favorite('fan1', 'a', 'b')
+    favorite('fan2', 'c', 'd')
+    return artworks, favorite
+
+
+def refresh(full=False):
+    # Each pair is favorited together by a single user here
+    return recommendations.refresh(full=full, min_support=1)
+
+
+def neighbors(artworks, name):
+    names = {artwork_id: n for n, artwork_id in artworks.items()}
+    return [names[artwork_id] for artwork_id, _ in recommendations.neighbors_for(artworks[name])]
+
+
+def computed_at(artworks):
+    return {
+        name: db.session.get(SimilarArtwork, artwork_id).computed_at
+        for name, artwork_id in artworks.items()
+    }
+
+
+def test_full_refresh_computes_every_artwork(app, client, gallery):
+    artworks, _ = gallery
+    with app.app_context():
+        # Below the default support every pair is noise
+        assert recommendations.refresh(full=True) == 4
+        assert neighbors(artworks, 'a') == []
+        assert refresh(full=True) == 4
+        assert recommendations.neighbors_for(artworks['a']) == [[artworks['b'], 1.0]]
+        assert neighbors(artworks, 'c') == ['d']
+
+    response = client.get(f"/api/artworks/{artworks['a']}/similar")
+    assert response.status_code == 200
+    assert [(a['id'], a['similarity']) for a in response.get_json()['artworks']] == [(artworks['b'], 1.0)]
+
+
+def test_incremental_refresh_only_recomputes_touched_artworks(app, gallery):
+    artworks, favorite = gallery
+    with app.app_context():
+        refresh(full=True)
+        # Nothing was favorited since the last run
+        assert refresh() == 0
+        before = computed_at(artworks)
+
+    favorite('fan3', 'a', 'c')
+    with app.app_context():
+        assert refresh() == 2
+        after = computed_at(artworks)
+        assert after['a'] > before['a'] and after['c'] > before['c']
+        assert (after['b'], after['d']) == (before['b'], before['d'])
+        assert neighbors(artworks, 'a') == ['b', 'c']
+        assert neighbors(artworks, 'c') == ['d', 'a']
+        # Untouched artworks keep the lists from the full run
+        assert neighbors(artworks, 'b') == ['a']
+
+
+def test_only_a_full_refresh_drops_removed_favorites(app, gallery):
+    artworks, favorite = gallery
+    with app.app_context():
+        refresh(full=True)
+
+    favorite('fan2', 'd', method='delete')
+    with app.app_context():
+        # Removed favorites are not tracked, so an incremental run misses them
+        assert refresh() == 0
+        assert neighbors(artworks, 'c') == ['d']
+        assert refresh(full=True) == 3
+        assert neighbors(artworks, 'c') == []
+        assert db.session.get(SimilarArtwork, artworks['d']) is None
@@ -0,0 +1,103 @@
+import sqlite3
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+# The tables as the first release created them: counters on artworks, and
+# favorites on the catalog database with foreign keys that do not cascade
+BASELINE_SCHEMA = '''
+CREATE TABLE users (
+    id INTEGER NOT NULL, username VARCHAR(50) NOT NULL, email VARCHAR(100) NOT NULL,
+    password VARCHAR(200) NOT NULL, is_artist BOOLEAN, created_at DATETIME,
+    PRIMARY KEY (id), UNIQUE (username), UNIQUE (email)
+);
+CREATE TABLE artworks (
+    id INTEGER NOT NULL, title VARCHAR(100) NOT NULL, description TEXT,
+    image_url VARCHAR(255) NOT NULL, artist_id INTEGER NOT NULL, category VARCHAR(50),
+    medium VARCHAR(50), dimensions VARCHAR(50), year INTEGER, location VARCHAR(100),
+    likes INTEGER, dislikes INTEGER, created_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(artist_id) REFERENCES users (id)
+);
+CREATE TABLE favorites (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, artwork_id INTEGER NOT NULL, created_at DATETIME,
+    PRIMARY KEY (id), UNIQUE (user_id, artwork_id),
+    FOREIGN KEY(user_id) REFERENCES users (id), FOREIGN KEY(artwork_id) REFERENCES artworks (id)
+);
+'''
+
+
+def seed_baseline(path):
+    connection = sqlite3.connect(path)
+    connection.executescript(BASELINE_SCHEMA)
+    password = generate_password_hash('secret')
+    connection.executemany('INSERT INTO users VALUES (?, ?, ?, ?, ?, ?)', [
+        (1, 'painter', 'painter@example.com', password, 1, '2023-01-01 00:00:00'),
+        (2, 'fan', 'fan@example.com', password, 0, '2023-01-01 00:00:00'),
+    ])
+    connection.executemany(
+        'INSERT INTO artworks (id, title, image_url, artist_id, category, likes, dislikes, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+            (1, 'First', 'https://example.com/1.jpg', 1, 'painting', 3, 1, '2023-02-01 00:00:00'),
+            (2, 'Second', 'https://example.com/2.jpg', 1, 'painting', 0, 0, '2023-03-01 00:00:00'),
+        ])
+    connection.executemany('INSERT INTO favorites VALUES (?, ?, ?, ?)', [
+        (1, 2, 1, '2023-04-01 00:00:00'),
+        (2, 2, 2, '2023-04-02 00:00:00'),
+    ])
+    connection.commit()
+    connection.close()
+
+
+def headers(client, username):
+    response = client.post('/api/login', json={'email': f'{username}@example.com', 'password': 'secret'})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+def favorite_ids(client, auth):
+    response = client.get('/api/favorites', headers=auth)
+    assert response.status_code == 200
+    return [artwork['id'] for artwork in response.get_json()['favorites']]
+
+
+def test_baseline_database_upgrades(database, make_app):
+    seed_baseline(database)
+    client = make_app().test_client()
+    fan, painter = headers(client, 'fan'), headers(client, 'painter')
+
+    assert favorite_ids(client, fan) == [1, 2]
+    artwork = client.get('/api/artworks/1').get_json()['artwork']
+    assert (artwork['likes'], artwork['dislikes']) == (3, 1)
+
+    # A second boot finds nothing left to migrate and loses nothing
+    client = make_app().test_client()
+    assert favorite_ids(client, fan) == [1, 2]
+
+    # Legacy foreign keys would make both of these fail
+    assert client.delete('/api/artworks/1', headers=painter).status_code == 200
+    assert favorite_ids(client, fan) == [2]
+    assert client.delete('/api/user', headers=fan).status_code == 200
+    assert client.delete('/api/user', headers=painter).status_code == 200
+    assert client.get('/api/artworks/2').status_code == 404
+
+
+@pytest.mark.parametrize('database', ['separate'], indirect=True)
+def test_split_moves_interactions_off_the_catalog(database, make_app, tmp_path, monkeypatch):
+    # Run with the binds shared first, so every interactions table is on the catalog
+    monkeypatch.delenv('INTERACTIONS_DATABASE_URI', raising=False)
+    seed_baseline(database)
+    client = make_app().test_client()
+    fan = headers(client, 'fan')
+    client.post('/api/artworks/2/like', headers=fan)
+    client.post('/api/artworks/2/comments', json={'content': 'Lovely'}, headers=fan)
+
+    monkeypatch.setenv('INTERACTIONS_DATABASE_URI', f"sqlite:///{tmp_path / 'split.db'}")
+    client = make_app().test_client()
+    assert favorite_ids(client, fan) == [1, 2]
+    artwork = client.get('/api/artworks/2').get_json()['artwork']
+    assert (artwork['likes'], artwork['comment_count']) == (1, 1)
+    assert client.get('/api/artworks/2/comments').get_json()['count'] == 1
+
+    tables = {row[0] for row in sqlite3.connect(database).execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not tables & {'favorites', 'artwork_reactions', 'comments', 'artist_stats', 'ranking_state'}
+    assert client.delete('/api/artworks/1', headers=headers(client, 'painter')).status_code == 200
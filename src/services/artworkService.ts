@@ -16,6 +16,26 @@ const API_URL = getApiUrl();
 // Configure axios defaults
 axios.defaults.withCredentials = true;
 
+// Comments as returned by /api/artworks/<id>/comments
+interface ApiComment {
+  id: number;
+  user_id: number;
+  username: string | null;
+  content: string;
+  created_at: string;
+}
+
+// Shape the API's comment into the one the pages render
+const toComment = (comment: ApiComment) => ({
+  id: String(comment.id),
+  content: comment.content,
+  user: {
+    id: String(comment.user_id),
+    username: comment.username ?? 'Unknown',
+  },
+  createdAt: comment.created_at,
+});
+
 const artworkService = {
   // Get all artworks with optional filters
   getAllArtworks: async (filters = {}) => {
@@ -122,26 +142,38 @@ const artworkService = {
   // Add a comment to artwork
   addComment: async (artworkId: string, content: string, token: string) => {
     try {
-      const response = await axios.post(`${API_URL}/artworks/${artworkId}/comments`, 
-        { content },
-        {
-          headers: {
-            'Authorization': `Bearer ${token}`
+      // Lets the post be resent without adding the comment twice
+      const idempotencyKey = crypto.randomUUID();
+      for (let attempt = 0; ; attempt++) {
+        const response = await axios.post(`${API_URL}/artworks/${artworkId}/comments`, 
+          { content },
+          {
+            headers: {
+              'Authorization': `Bearer ${token}`,
+              'Idempotency-Key': idempotencyKey
+            }
           }
+        );
+        // The API answers { message, comment }, or 202 while the comment is still being saved
+        if (response.status !== 202) {
+          return toComment(response.data.comment);
         }
-      );
-      return response.data;
+        if (attempt >= 4) {
+          throw new Error('Comment is still being saved, refresh to see it');
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000));
+      }
     } catch (error) {
       console.error('Error adding comment:', error);
       throw error;
     }
   },
 
-  // Get artwork comments
+  // Get the first page of artwork comments, newest first
   getComments: async (artworkId: string) => {
     try {
       const response = await axios.get(`${API_URL}/artworks/${artworkId}/comments`);
-      return response.data;
+      return response.data.comments.map(toComment);
     } catch (error) {
       console.error('Error fetching comments:', error);
       throw error;